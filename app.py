@@ -1,18 +1,29 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime, timedelta, date
-import requests
-from icalendar import Calendar
-from dateutil.rrule import rrulestr
-from pytz import UTC, timezone
+from datetime import datetime, date
+from pytz import timezone
 import os
 import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from tkcalendar import DateEntry
-import csv
 from tkinter.filedialog import asksaveasfilename
 from tkinter.filedialog import askopenfilename
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
+from tkinter.simpledialog import askinteger
+import sprint_engine as engine
+from feed_cache import FeedCache
+from cache_ocorrencias import CacheOcorrencias
+from fuso import ConversorFuso
+from modelo_eventos import ModeloEventos
+from armazenamento import EntregasStore, LocalEventStore
+from excedentes import ExcedentesStore
+from perfil import PERFIL
+
+# Marcadores da coluna de seleção da lista de eventos
+MARCADO = "☑"
+DESMARCADO = "☐"
+
 
 class CalendarTrackerApp:
     def __init__(self, root):
@@ -22,20 +33,264 @@ class CalendarTrackerApp:
         # Configurações
         self.config_file = "config.json"
         self.excess_minutes_file = "excess_minutes.json"
-        self.local_events_file = "local_events.json"
-        self.tz_brasil = timezone('America/Sao_Paulo')
+        self.excess_archive_file = "excess_minutes_archive.json"
+        self.local_events_file = "local_events.json"  # Legado: importado para o banco
+        self.db_file = "sprint_tracker.db"
+        self.feed_cache = FeedCache("feed_cache")
+        self.tz = timezone(engine.TZ_PADRAO)   # Trocado pelo 'timezone' do config.json, se houver
+        self.fuso = ConversorFuso(self.tz)
         
         # Variáveis
-        self.eventos_atuais = []
-        self.check_vars = []
-        self.excess_minutes = {}  # Dicionário para armazenar minutos excedentes
-        self.local_events = []    # Lista para armazenar eventos locais
+        self.periodo_exibido = None    # (inicio, fim) da lista exibida; recargas do mesmo período usam diff
+        self.modelo = ModeloEventos(self.fuso)  # Eventos exibidos; o iid da Treeview é o id no modelo
+        self.editor_excedentes = None  # (iid, Spinbox) durante a edição inline
+        self.totais_agendados = None   # id do after_idle pendente do label de totais
+        self.config = {}          # Conteúdo do config.json (chaves desconhecidas são preservadas)
+        self.excedentes = None    # Minutos excedentes dos eventos do calendário (ExcedentesStore)
+        self.gravacao_excedentes_agendada = None
+        self.local_store = None   # Eventos locais (LocalEventStore)
+        self.cache_ocorrencias = None  # Ocorrências expandidas por feed (CacheOcorrencias)
+        self.atualizacao_agendada = None  # id do after da próxima atualização automática
+        self.falhas_atualizacao = 0       # Falhas seguidas (backoff exponencial)
+
+        # Carregamento em segundo plano
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.fila_resultados = queue.Queue()
+        self.geracao_carregamento = 0      # Resultados de gerações antigas são descartados
+        self.cancelar_carregamento_atual = None
         
-        # Interface
+        # Interface: a janela aparece antes da leitura dos arquivos
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.ao_fechar)
+        self.root.after_idle(self.carregar_dados_iniciais)
+
+    def carregar_dados_iniciais(self):
+        """Config, minutos excedentes, eventos locais e entregas, lidos depois de a janela ser exibida"""
         self.carregar_config()
+        self.configurar_perfil()
+        self.definir_fuso(self.config.get('timezone', engine.TZ_PADRAO))
+        self.cache_ocorrencias = CacheOcorrencias(
+            "occurrence_cache",
+            horizonte_dias=self.config.get('occurrence_cache_days', 180),
+            limite_mb=self.config.get('occurrence_cache_mb', 64)
+        )
         self.carregar_minutos_excedentes()
         self.carregar_eventos_locais()
+        self.carregar_tarefas()
+        if self.auto_refresh_var.get():
+            self.agendar_atualizacao_automatica()
+
+    def definir_fuso(self, nome):
+        """Fuso usado para exibir, agrupar e exportar (config 'timezone', padrão America/Sao_Paulo)"""
+        try:
+            tz = timezone(nome)
+        except Exception as e:
+            print(f"Fuso horário inválido '{nome}', usando {engine.TZ_PADRAO}: {e}")
+            tz = timezone(engine.TZ_PADRAO)
+        if tz is not self.tz:
+            self.tz = tz
+            self.fuso = ConversorFuso(tz)
+            self.modelo.fuso = self.fuso
+
+    def ao_fechar(self):
+        if self.atualizacao_agendada is not None:
+            self.root.after_cancel(self.atualizacao_agendada)
+        if self.gravacao_excedentes_agendada is not None:
+            self.root.after_cancel(self.gravacao_excedentes_agendada)
+        self.salvar_minutos_excedentes()
+        self.cancelar_carregamento()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.local_store is not None:
+            self.local_store.fechar()
+        if self.entregas_store is not None:
+            self.entregas_store.fechar()
+        self.root.destroy()
+
+    def iniciar_carregamento(self, obter_ics, titulo_erro, mensagem_sucesso=None, exibir_em_erro=False,
+                             periodos=None, ao_concluir=None, ao_erro=None, silencioso=False):
+        """Executa download/parse numa thread e entrega o resultado à interface via root.after
+
+        `obter_ics` retorna o context manager que entrega o conteúdo do feed
+        (engine.abrir_url ou engine.abrir_ics), aberto dentro da thread.
+
+        Um novo carregamento substitui o anterior: o antigo é cancelado e seu
+        resultado, se chegar, é ignorado. Com `periodos` e `ao_concluir`, o
+        feed é expandido uma vez sobre todos os períodos e os eventos vão para
+        `ao_concluir` em vez da lista da sprint. `ao_erro` substitui a
+        mensagem de erro e `silencioso` não mostra a barra de progresso
+        (usados pela atualização automática).
+        """
+        try:
+            data_inicio, data_fim = self.periodo_atual()
+        except Exception as e:
+            messagebox.showerror("Erro", f"Data inválida: {str(e)}")
+            return
+        if periodos is None:
+            periodos = [(data_inicio, data_fim)]
+        if ao_concluir is None:
+            def ao_concluir(eventos):
+                with PERFIL.span("montar_lista"):
+                    self.atualizar_eventos(eventos, data_inicio, data_fim)
+        if ao_erro is None:
+            def ao_erro(erro):
+                messagebox.showerror("Erro", f"{titulo_erro}:\n{str(erro)}")
+                if exibir_em_erro:
+                    self.exibir_eventos([], data_inicio, data_fim)
+
+        self.cancelar_carregamento()
+        self.geracao_carregamento += 1
+        geracao = self.geracao_carregamento
+        cancelar = threading.Event()
+        self.cancelar_carregamento_atual = cancelar
+        politica = self.politica_atual()
+        cache_ocorrencias = self.cache_ocorrencias
+        fila = self.fila_resultados
+        arquivo_cprofile = self.config.get('profile_cprofile')
+
+        def tarefa():
+            try:
+                fila.put((geracao, 'progresso', "Baixando calendário..."))
+                with PERFIL.cprofile(arquivo_cprofile), obter_ics() as ics_data:
+                    eventos = engine.carregar_eventos_calendario(
+                        ics_data, periodos[0][0], periodos[-1][1],
+                        progresso=lambda msg: fila.put((geracao, 'progresso', msg)),
+                        cancelado=cancelar.is_set,
+                        politica=politica,
+                        cache_ocorrencias=cache_ocorrencias
+                    )
+                fila.put((geracao, 'ok', eventos))
+            except engine.CarregamentoCancelado:
+                fila.put((geracao, 'cancelado', None))
+            except Exception as e:
+                fila.put((geracao, 'erro', e))
+
+        self.salvar_config()
+        if not silencioso:
+            self.mostrar_progresso("Carregando...")
+        PERFIL.limpar()  # O resumo de perfil cobre só este carregamento
+        self.executor.submit(tarefa)
+        self.root.after(50, lambda: self.verificar_resultados(geracao, ao_concluir, ao_erro, mensagem_sucesso))
+
+    def verificar_resultados(self, geracao, ao_concluir, ao_erro, mensagem_sucesso):
+        """Consome a fila de resultados na thread da interface"""
+        if geracao != self.geracao_carregamento:
+            return  # Carregamento substituído ou cancelado
+
+        while True:
+            try:
+                msg_geracao, tipo, valor = self.fila_resultados.get_nowait()
+            except queue.Empty:
+                break
+            if msg_geracao != geracao:
+                continue
+
+            if tipo == 'progresso':
+                self.progresso_label.config(text=valor)
+                continue
+
+            self.esconder_progresso()
+            self.cancelar_carregamento_atual = None
+            if tipo == 'ok':
+                ao_concluir(valor)
+                self.root.after_idle(self.exibir_perfil)  # Depois do calcular_total agendado por ao_concluir
+                if mensagem_sucesso:
+                    messagebox.showinfo("Sucesso", mensagem_sucesso)
+            elif tipo == 'erro':
+                ao_erro(valor)
+            return
+
+        self.root.after(50, lambda: self.verificar_resultados(geracao, ao_concluir, ao_erro, mensagem_sucesso))
+
+    def configurar_perfil(self):
+        """Opções de medição do config.json: 'debug_log', 'profile_trace' (JSON) e 'profile_cprofile' (.prof)"""
+        PERFIL.debug_ativo = bool(self.config.get('debug_log', False))
+        PERFIL.trace_ativo = bool(self.config.get('profile_trace'))
+
+    def exibir_perfil(self):
+        """Resumo de tempos e contadores do último carregamento na barra de status"""
+        self.perfil_label.config(text=PERFIL.resumo())
+        if self.config.get('profile_trace'):
+            PERFIL.gravar_trace(self.config['profile_trace'])
+
+    def intervalo_atualizacao_ms(self):
+        """Intervalo da atualização automática, dobrando a cada falha seguida (até 1h ou o próprio intervalo)"""
+        intervalo = max(1, self.config.get('auto_refresh_minutes', 10))
+        minutos = min(intervalo * 2 ** self.falhas_atualizacao, max(intervalo, 60))
+        return int(minutos * 60 * 1000)
+
+    def agendar_atualizacao_automatica(self):
+        if self.atualizacao_agendada is not None:
+            self.root.after_cancel(self.atualizacao_agendada)
+        self.atualizacao_agendada = self.root.after(self.intervalo_atualizacao_ms(), self.atualizacao_automatica)
+
+    def alternar_atualizacao_automatica(self):
+        self.falhas_atualizacao = 0
+        if self.auto_refresh_var.get():
+            self.agendar_atualizacao_automatica()
+        elif self.atualizacao_agendada is not None:
+            self.root.after_cancel(self.atualizacao_agendada)
+            self.atualizacao_agendada = None
+            self.status_atualizacao_label.config(text="")
+        self.salvar_config()
+
+    def atualizacao_automatica(self):
+        """Recarrega a URL em segundo plano; erros não abrem janela, só adiam a próxima tentativa"""
+        self.atualizacao_agendada = None
+        if not self.auto_refresh_var.get():
+            return
+        # O próximo ciclo já fica agendado, mesmo se esta carga for cancelada por uma manual
+        self.agendar_atualizacao_automatica()
+        url = self.url_entry.get().strip()
+        if not url or self.cancelar_carregamento_atual is not None:
+            return  # Sem URL ou com carregamento manual em andamento
+        try:
+            data_inicio, data_fim = self.periodo_atual()
+        except Exception:
+            return
+
+        def concluir(eventos):
+            self.atualizar_eventos(eventos, data_inicio, data_fim)
+            if self.falhas_atualizacao:
+                self.falhas_atualizacao = 0
+                self.agendar_atualizacao_automatica()
+            self.status_atualizacao_label.config(text=f"Atualizado às {datetime.now().strftime('%H:%M')}")
+
+        def falhar(erro):
+            self.falhas_atualizacao += 1
+            self.agendar_atualizacao_automatica()
+            proxima = self.intervalo_atualizacao_ms() // 60000
+            self.status_atualizacao_label.config(text=f"Falha ao atualizar; nova tentativa em {proxima} min")
+            print(f"Erro na atualização automática: {erro}")
+
+        self.iniciar_carregamento(
+            lambda: self.abrir_url(url),
+            "Falha ao atualizar calendário",
+            ao_concluir=concluir,
+            ao_erro=falhar,
+            silencioso=True
+        )
+
+    def cancelar_carregamento(self):
+        if self.cancelar_carregamento_atual is not None:
+            self.cancelar_carregamento_atual.set()
+            self.cancelar_carregamento_atual = None
+            # Invalida o resultado pendente
+            self.geracao_carregamento += 1
+        self.esconder_progresso()
+
+    def mostrar_progresso(self, texto):
+        self.progresso_label.config(text=texto)
+        self.progresso_frame.grid()
+        self.progresso_bar.start(10)
+
+    def esconder_progresso(self):
+        self.progresso_bar.stop()
+        self.progresso_frame.grid_remove()
+
+    def abrir_url(self, url):
+        """Download em blocos para o cache do feed, com o limite da config 'max_feed_mb'"""
+        return engine.abrir_url(url, cache=self.feed_cache,
+                                limite_mb=self.config.get('max_feed_mb', engine.LIMITE_FEED_MB))
 
     def importar_arquivo_ics(self):
         filepath = askopenfilename(
@@ -46,107 +301,166 @@ class CalendarTrackerApp:
         if not filepath:
             return  # usuário cancelou
 
-        try:
-            with open(filepath, 'rb') as f:
-                ics_data = f.read()
+        self.iniciar_carregamento(
+            lambda: engine.abrir_ics(filepath),
+            "Falha ao importar arquivo ICS",
+            mensagem_sucesso="Arquivo ICS importado e eventos carregados."
+        )
 
-            calendario = Calendar.from_ical(ics_data)
+    def politica_atual(self):
+        """Chave da política de conflito escolhida no combobox"""
+        nome = self.politica_var.get()
+        for chave, exibido in engine.POLITICAS_CONFLITO.items():
+            if exibido == nome:
+                return chave
+        return engine.POLITICA_PADRAO
+
+    def periodo_atual(self):
+        """Retorna (data_inicio, data_fim) da sprint selecionada na interface"""
+        data_inicio = self.date_picker.get_date()
+        data_fim = None if self.two_weeks_var.get() else self.end_date_picker.get_date()
+        return engine.periodo_sprint(data_inicio, data_fim, self.two_weeks_var.get())
+
+    def exibir_eventos(self, eventos_calendario, data_inicio, data_fim):
+        """Recria a lista de eventos com os do calendário e os locais do período"""
+        # Limpar lista de eventos
+        self.cancelar_edicao_excedentes()
+        self.event_tree.delete(*self.event_tree.get_children())
+        self.modelo.limpar()
+        self.periodo_exibido = (data_inicio, data_fim)
 
-            if self.two_weeks_var.get():
-                data_inicio = self.date_picker.get_date()
-                data_fim = data_inicio + timedelta(days=13)
-            else:
-                data_inicio = self.date_picker.get_date()
-                data_fim = self.end_date_picker.get_date()
-
-            # Limpar interface
-            for widget in self.scrollable_frame.winfo_children():
-                widget.destroy()
-
-            self.check_vars = []
-            self.eventos_atuais = []
-
-            eventos_calendario = self.processar_calendario(calendario, data_inicio, data_fim)
-            eventos_calendario = self.aplicar_filtros(eventos_calendario)
-            self.eventos_atuais.extend(eventos_calendario)
-
-            # Carregar eventos locais dentro do período
-            eventos_locais_periodo = [
-                e for e in self.local_events if data_inicio <= e['start'].date() <= data_fim
-            ]
-
-            self.salvar_config()
-
-            for inicio, fim, descricao in sorted(eventos_calendario, key=lambda x: x[0]):
-                inicio_br = inicio.astimezone(self.tz_brasil)
-                event_key = f"{inicio_br.strftime('%Y%m%d%H%M')}_{descricao}"
-                excess_min = self.excess_minutes.get(event_key, 0)
-                self.adicionar_evento_na_interface(inicio, fim, descricao, False, excess_min)
-
-            for event in sorted(eventos_locais_periodo, key=lambda x: x['start']):
-                self.adicionar_evento_na_interface(
-                    event['start'],
-                    event['end'],
-                    event['description'],
-                    True,
-                    event.get('excess_minutes', 0)
-                )
+        # Adicionar eventos do calendário
+        for inicio, fim, descricao, chave in eventos_calendario:
+            # Obter minutos excedentes salvos (migrando a chave antiga se existir)
+            inicio_local = self.fuso.local(inicio)
+            excess_min = self.excedentes.obter(chave, engine.chave_excedente(inicio_local, descricao))
 
-            self.calcular_total()
-            self.atualizar_tarefas_visiveis()
+            self.adicionar_evento_na_interface(inicio, fim, descricao, False, excess_min, chave=chave,
+                                               inicio_local=inicio_local)
 
-            messagebox.showinfo("Sucesso", "Arquivo ICS importado e eventos carregados.")
+        if self.excedentes.pendente:
+            self.agendar_gravacao_excedentes()
 
-        except Exception as e:
-            messagebox.showerror("Erro", f"Falha ao importar arquivo ICS:\n{str(e)}")
+        # Carregar eventos locais dentro do período
+        for event in self.local_store.no_periodo(data_inicio, data_fim):
+            self.adicionar_evento_na_interface(
+                event['start'],
+                event['end'],
+                event['description'],
+                True,
+                event.get('excess_minutes', 0),  # Usar .get() para evitar KeyError
+                local_event=event
+            )
+
+        self.calcular_total()
+        self.atualizar_tarefas_visiveis()
+
+    def atualizar_eventos(self, eventos_calendario, data_inicio, data_fim):
+        """Aplica uma recarga do mesmo período só nas linhas que mudaram
+
+        Eventos são casados pela chave estável (UID/RECURRENCE-ID): os que
+        continuam mantêm seleção e excedentes; só inclusões, remoções e
+        mudanças de horário/descrição tocam na Treeview. Outro período (ou
+        chaves repetidas) recria a lista.
+        """
+        novos = {}
+        for evento in eventos_calendario:
+            if evento[3] in novos:
+                return self.exibir_eventos(eventos_calendario, data_inicio, data_fim)
+            novos[evento[3]] = evento
+        if self.periodo_exibido != (data_inicio, data_fim):
+            return self.exibir_eventos(eventos_calendario, data_inicio, data_fim)
+
+        atuais = self.modelo.ids_por_chave()
+        mudou_ordem = False
+
+        for chave, ids in atuais.items():
+            # Chave que saiu do calendário some inteira; repetidas de uma carga anterior ficam só com a primeira
+            for evento_id in (ids if chave not in novos else ids[1:]):
+                if self.editor_excedentes is not None and self.editor_excedentes[0] == str(evento_id):
+                    self.cancelar_edicao_excedentes()
+                self.modelo.remover(evento_id)
+                self.event_tree.delete(str(evento_id))
+
+        for chave, (inicio, fim, descricao, _) in novos.items():
+            evento_id = atuais[chave][0] if chave in atuais else None
+            if evento_id is None:
+                inicio_local = self.fuso.local(inicio)
+                excess_min = self.excedentes.obter(chave, engine.chave_excedente(inicio_local, descricao))
+                self.adicionar_evento_na_interface(inicio, fim, descricao, False, excess_min, chave=chave,
+                                                   inicio_local=inicio_local)
+                mudou_ordem = True
+                continue
+            evento = self.modelo[evento_id]
+            if (evento.inicio, evento.fim, evento.descricao) != (inicio, fim, descricao):
+                mudou_ordem = mudou_ordem or evento.inicio != inicio
+                self.modelo.atualizar_horario(evento_id, inicio, fim, descricao)
+                self.event_tree.item(str(evento_id), values=self.valores_linha(evento))
+
+        if mudou_ordem:
+            self.ordenar_linhas()
+        if self.excedentes.pendente:
+            self.agendar_gravacao_excedentes()
+        self.sincronizar_eventos_locais(data_inicio, data_fim)
+        self.calcular_total()
+
+    def sincronizar_eventos_locais(self, data_inicio, data_fim):
+        """Inclui/remove as linhas dos eventos locais do período sem recriar a lista
+
+        Eventos locais são casados pelo id do banco; os que continuam mantêm
+        seleção e linha.
+        """
+        exibidos = {evento.local_event['id']: evento_id for evento_id, evento in self.modelo.itens()
+                    if evento.is_local}
+        no_periodo = {event['id']: event for event in self.local_store.no_periodo(data_inicio, data_fim)}
+
+        for local_id, evento_id in exibidos.items():
+            if local_id not in no_periodo:
+                if self.editor_excedentes is not None and self.editor_excedentes[0] == str(evento_id):
+                    self.cancelar_edicao_excedentes()
+                self.modelo.remover(evento_id)
+                self.event_tree.delete(str(evento_id))
+        for local_id, event in no_periodo.items():
+            if local_id not in exibidos:
+                self.adicionar_evento_na_interface(event['start'], event['end'], event['description'], True,
+                                                   event.get('excess_minutes', 0), local_event=event)
+
+    def ordenar_linhas(self):
+        """Eventos do calendário por início, seguidos dos locais (mesma ordem de exibir_eventos)"""
+        calendario = sorted(
+            (evento.inicio, evento.fim, evento_id) for evento_id, evento in self.modelo.itens() if not evento.is_local)
+        ordem = [str(evento_id) for _, _, evento_id in calendario]
+        ordem += [str(evento_id) for evento_id, evento in self.modelo.itens() if evento.is_local]
+        if list(self.event_tree.get_children()) != ordem:
+            self.event_tree.set_children('', *ordem)
 
     def carregar_minutos_excedentes(self):
         """Carrega os minutos excedentes salvos anteriormente"""
-        if os.path.exists(self.excess_minutes_file):
-            try:
-                with open(self.excess_minutes_file, 'r') as f:
-                    self.excess_minutes = json.load(f)
-            except Exception as e:
-                print(f"Erro ao carregar minutos excedentes: {e}")
-                self.excess_minutes = {}
+        horizonte = self.config.get('excess_horizon_days', 180)
+        self.excedentes = ExcedentesStore(self.excess_minutes_file, self.excess_archive_file, horizonte)
+        self.excedentes.carregar()
+        if self.excedentes.pendente:
+            self.agendar_gravacao_excedentes()
+
+    def agendar_gravacao_excedentes(self, atraso_ms=2000):
+        """Agrupa alterações de excedentes numa única gravação depois de `atraso_ms`"""
+        if self.gravacao_excedentes_agendada is not None:
+            self.root.after_cancel(self.gravacao_excedentes_agendada)
+        self.gravacao_excedentes_agendada = self.root.after(atraso_ms, self.salvar_minutos_excedentes)
 
     def salvar_minutos_excedentes(self):
-        """Salva os minutos excedentes no arquivo"""
-        try:
-            with open(self.excess_minutes_file, 'w') as f:
-                json.dump(self.excess_minutes, f)
-        except Exception as e:
-            print(f"Erro ao salvar minutos excedentes: {e}")
+        """Grava os minutos excedentes pendentes no arquivo"""
+        self.gravacao_excedentes_agendada = None
+        if self.excedentes is not None:
+            self.excedentes.gravar()
 
     def carregar_eventos_locais(self):
-        """Carrega os eventos locais salvos anteriormente"""
-        if os.path.exists(self.local_events_file):
-            try:
-                with open(self.local_events_file, 'r') as f:
-                    self.local_events = json.load(f)
-                    # Converter strings de data para objetos datetime
-                    for event in self.local_events:
-                        event['start'] = datetime.strptime(event['start'], '%Y-%m-%d %H:%M')
-                        event['end'] = datetime.strptime(event['end'], '%Y-%m-%d %H:%M')
-            except Exception as e:
-                print(f"Erro ao carregar eventos locais: {e}")
-                self.local_events = []
-
-    def salvar_eventos_locais(self):
-        """Salva os eventos locais no arquivo"""
+        """Abre o banco de eventos locais (importando o local_events.json na primeira vez)"""
         try:
-            # Converter objetos datetime para strings antes de salvar
-            events_to_save = []
-            for event in self.local_events:
-                event_copy = event.copy()
-                event_copy['start'] = event['start'].strftime('%Y-%m-%d %H:%M')
-                event_copy['end'] = event['end'].strftime('%Y-%m-%d %H:%M')
-                events_to_save.append(event_copy)
-                
-            with open(self.local_events_file, 'w') as f:
-                json.dump(events_to_save, f)
+            self.local_store = LocalEventStore(self.db_file, self.local_events_file)
         except Exception as e:
-            print(f"Erro ao salvar eventos locais: {e}")
+            print(f"Erro ao carregar eventos locais: {e}")
+            self.local_store = LocalEventStore(":memory:", None)
 
     def adicionar_evento_local(self):
         """Abre uma janela para adicionar um novo evento local"""
@@ -219,15 +533,17 @@ class CalendarTrackerApp:
                     'excess_minutes': excess_min
                 }
                 
-                self.local_events.append(new_event)
-                self.salvar_eventos_locais()
+                self.local_store.inserir(new_event)
                 
-                # Se a data do evento estiver dentro da sprint atual, recarregar os eventos
-                current_start = self.date_picker.get_date()
-                current_end = current_start + timedelta(days=13)
+                # Se a data do evento estiver dentro da sprint exibida, incluir a linha
+                current_start, current_end = self.periodo_atual()
                 
                 if current_start <= start_dt.date() <= current_end:
-                    self.carregar_eventos()
+                    if self.periodo_exibido == (current_start, current_end):
+                        self.sincronizar_eventos_locais(current_start, current_end)
+                        self.calcular_total()
+                    else:
+                        self.carregar_eventos()
                 
                 messagebox.showinfo("Sucesso", "Evento local adicionado com sucesso")
                 dialog.destroy()
@@ -244,13 +560,20 @@ class CalendarTrackerApp:
     
 
     def exportar_csv(self):
-        if not self.eventos_atuais and not self.local_events:
+        self.exportar(".csv", "Arquivo CSV", "escrever_csv")
+
+    def exportar_xlsx(self):
+        self.exportar(".xlsx", "Planilha Excel", "escrever_xlsx")
+
+    def exportar(self, extensao, descricao_tipo, escritor):
+        """Exporta os eventos selecionados e as entregas com o escritor de exportacao.py"""
+        if not len(self.modelo):
             messagebox.showwarning("Aviso", "Não há eventos para exportar")
             return
 
         filepath = asksaveasfilename(
-            defaultextension=".csv",
-            filetypes=[("Arquivo CSV", "*.csv"), ("Todos os arquivos", "*.*")],
+            defaultextension=extensao,
+            filetypes=[(descricao_tipo, "*" + extensao), ("Todos os arquivos", "*.*")],
             title="Salvar como"
         )
 
@@ -258,96 +581,76 @@ class CalendarTrackerApp:
             return
 
         try:
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile, delimiter=';')
-
-                # --------- Parte 1: Eventos ---------
-                writer.writerow([
-                    "Data", 
-                    "Hora Início", 
-                    "Hora Fim", 
-                    "Duração (minutos)", 
-                    "Excedidos",
-                    "Duração Total",
-                    "Descrição",
-                    "Tipo (Local/Calendário)"
-                ])
-
-                eventos_selecionados = []
-
-                for frame in self.scrollable_frame.winfo_children():
-                    if hasattr(frame, 'event_data'):
-                        for widget in frame.winfo_children():
-                            if isinstance(widget, ttk.Checkbutton) and frame.check_var.get() == 1:
-                                inicio, fim, descricao = frame.event_data
-                                excess_min = int(frame.excess_spin.get())
-                                eventos_selecionados.append((inicio, fim, descricao, excess_min, False))
-                                break
-                    elif hasattr(frame, 'local_event_data'):
-                        for widget in frame.winfo_children():
-                            if isinstance(widget, ttk.Checkbutton) and frame.check_var.get() == 1:
-                                event_data = frame.local_event_data
-                                eventos_selecionados.append((
-                                    event_data['start'],
-                                    event_data['end'],
-                                    event_data['description'],
-                                    event_data['excess_minutes'],
-                                    True
-                                ))
-                                break
-
-                eventos_selecionados.sort(key=lambda x: self.to_naive_local(x[0]))                
-                for inicio, fim, descricao, excess_min, is_local in eventos_selecionados:
-                    print(f"[DEBUG] {descricao} - inicio: {inicio} ({inicio.tzinfo}), fim: {fim} ({fim.tzinfo})")
-                    inicio_naive = self.to_naive_local(inicio)
-                    fim_naive = self.to_naive_local(fim)
-
-                    duracao = int((fim_naive - inicio_naive).total_seconds() / 60)
-                    duracao_total = duracao + excess_min
-
-                    writer.writerow([
-                        inicio_naive.strftime('%Y-%m-%d'),
-                        inicio_naive.strftime('%H:%M'),
-                        fim_naive.strftime('%H:%M'),
-                        str(duracao),
-                        str(excess_min),
-                        str(duracao_total),
-                        descricao,
-                        "Local" if is_local else "Calendário"
-                    ])
-
-                # --------- Linha em branco + cabeçalho de tarefas ---------
-                writer.writerow([])
-                writer.writerow(["Entregas da Sprint"])
-                writer.writerow(["Data", "Tarefa"])
-
-                data_inicio = self.date_picker.get_date()
-                data_fim = data_inicio + timedelta(days=13) if self.two_weeks_var.get() else self.end_date_picker.get_date()
-
-
-                for tarefa, data_str in self.tarefas_data.items():
-                    try:
-                        data = datetime.strptime(data_str, "%Y-%m-%d").date()
-                        if data_inicio <= data <= data_fim:
-                            writer.writerow([data_str, tarefa])
-                    except Exception as e:
-                        print(f"Erro ao exportar tarefa '{tarefa}': {e}")
+            import exportacao  # Import tardio: numpy/openpyxl só são carregados ao exportar
+
+            data_inicio, data_fim = self.periodo_atual()
+            entregas = self.entregas_no_periodo(data_inicio, data_fim)
+            with PERFIL.span("exportacao"):
+                getattr(exportacao, escritor)(filepath, self.modelo.selecionados(), entregas)
 
             messagebox.showinfo("Sucesso", f"Eventos e entregas exportados com sucesso para:\n{filepath}")
 
         except Exception as e:
             messagebox.showerror("Erro", f"Falha ao exportar:\n{str(e)}")
 
-    def to_naive_local(self, dt):
-        if isinstance(dt, datetime):
-            if dt.tzinfo is not None:
-                return dt.astimezone(self.tz_brasil).replace(tzinfo=None)
-            return dt
-        elif isinstance(dt, date):
-            return datetime.combine(dt, datetime.min.time())
-        else:
-            raise TypeError(f"Esperado datetime/date, recebido: {type(dt)}")
-    
+    def gerar_relatorio_sprints(self):
+        """Relatório das últimas sprints (terminando na selecionada) com um único download e parse"""
+        url = self.url_entry.get().strip()
+        if not url:
+            messagebox.showwarning("Aviso", "Informe a URL do calendário para gerar o relatório")
+            return
+
+        quantidade = askinteger("Relatório de Sprints", "Quantas sprints (terminando na selecionada)?",
+                                initialvalue=self.config.get('report_sprints', 10), minvalue=1, maxvalue=200,
+                                parent=self.root)
+        if not quantidade:
+            return
+
+        filepath = asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("Arquivo CSV", "*.csv"), ("Planilha Excel", "*.xlsx"), ("Todos os arquivos", "*.*")],
+            title="Salvar relatório como"
+        )
+        if not filepath:
+            return
+
+        import exportacao
+        import relatorio
+
+        try:
+            data_fim_sel = None if self.two_weeks_var.get() else self.end_date_picker.get_date()
+            periodos = relatorio.periodos_sprints(self.date_picker.get_date(), quantidade, data_fim_sel,
+                                                  self.two_weeks_var.get())
+        except Exception as e:
+            messagebox.showerror("Erro", f"Data inválida: {str(e)}")
+            return
+        self.config['report_sprints'] = quantidade
+
+        def concluir(eventos):
+            try:
+                resumo = relatorio.resumir_sprints(
+                    eventos, periodos, self.fuso, self.entregas_no_periodo(periodos[0][0], periodos[-1][1]),
+                    obter_excedentes=lambda inicio_local, descricao, chave: self.excedentes.obter(
+                        chave, engine.chave_excedente(inicio_local, descricao)),
+                    eventos_locais=self.local_store.no_periodo(periodos[0][0], periodos[-1][1])
+                )
+                if filepath.lower().endswith('.xlsx'):
+                    exportacao.escrever_relatorio_xlsx(filepath, resumo)
+                else:
+                    exportacao.escrever_relatorio_csv(filepath, resumo)
+                if self.excedentes.pendente:
+                    self.agendar_gravacao_excedentes()
+                messagebox.showinfo("Sucesso", f"Relatório de {quantidade} sprints salvo em:\n{filepath}")
+            except Exception as e:
+                messagebox.showerror("Erro", f"Falha ao gerar relatório:\n{str(e)}")
+
+        self.iniciar_carregamento(
+            lambda: self.abrir_url(url),
+            "Falha ao gerar relatório",
+            periodos=periodos,
+            ao_concluir=concluir
+        )
+
     def toggle_end_date(self):
         if self.two_weeks_var.get():
             self.end_date_label.grid_remove()
@@ -356,51 +659,44 @@ class CalendarTrackerApp:
             self.end_date_label.grid()
             self.end_date_picker.grid()
 
+    def entregas_no_periodo(self, data_inicio, data_fim):
+        """(data_str, tarefa) das entregas do período, ordenadas por data"""
+        return [(data_str, tarefa) for _, data_str, tarefa in self.entregas_store.no_periodo(data_inicio, data_fim)]
+
     def atualizar_tarefas_visiveis(self):
         self.task_listbox.delete(0, tk.END)
-        if self.two_weeks_var.get():
-            data_inicio = self.date_picker.get_date()
-            data_fim = data_inicio + timedelta(days=13)
-        else:
-            data_inicio = self.date_picker.get_date()
-            data_fim = self.end_date_picker.get_date()
+        data_inicio, data_fim = self.periodo_atual()
 
-        for tarefa, data_str in self.tarefas_data.items():
-            try:
-                data_tarefa = datetime.strptime(data_str, '%Y-%m-%d').date()
-                if data_inicio <= data_tarefa <= data_fim:
-                    self.task_listbox.insert(tk.END, tarefa)
-            except Exception as e:
-                print(f"Erro ao verificar tarefa '{tarefa}': {e}")
+        self.ids_tarefas_visiveis = []  # id da entrega de cada linha da lista
+        for entrega_id, _, tarefa in self.entregas_store.no_periodo(data_inicio, data_fim):
+            self.task_listbox.insert(tk.END, tarefa)
+            self.ids_tarefas_visiveis.append(entrega_id)
 
     def adicionar_tarefa(self):
         tarefa = self.task_entry.get().strip()
         if tarefa:
-            hoje_str = date.today().isoformat()
-            self.tarefas_data[tarefa] = hoje_str
+            # Grava só a nova entrega
+            entrega_id = self.entregas_store.inserir(date.today(), tarefa)
             self.task_listbox.insert(tk.END, tarefa)
+            self.ids_tarefas_visiveis.append(entrega_id)
             self.task_entry.delete(0, tk.END)
-            self.salvar_tarefas()
 
-    def salvar_tarefas(self):
-        tarefas = []
-        for i in range(self.task_listbox.size()):
-            texto = self.task_listbox.get(i)
-            data = self.tarefas_data.get(texto, date.today().isoformat())
-            tarefas.append({"text": texto, "date": data})
-        with open(self.task_file, 'w', encoding='utf-8') as f:
-            json.dump(tarefas, f, ensure_ascii=False, indent=2)
+    def remover_tarefa(self, event=None):
+        selecao = self.task_listbox.curselection()
+        if not selecao:
+            return
+        indice = selecao[0]
+        self.entregas_store.remover(self.ids_tarefas_visiveis.pop(indice))
+        self.task_listbox.delete(indice)
 
     def carregar_tarefas(self):
-        self.tarefas_data = {}
-        if os.path.exists(self.task_file):
-            try:
-                with open(self.task_file, 'r', encoding='utf-8') as f:
-                    tarefas = json.load(f)
-                    for t in tarefas:
-                        self.tarefas_data[t["text"]] = t["date"]
-            except Exception as e:
-                print(f"Erro ao carregar entregas: {e}")
+        """Abre as entregas no banco (importando o sprint_tasks.json na primeira vez)"""
+        try:
+            self.entregas_store = EntregasStore(self.db_file, self.task_file)
+        except Exception as e:
+            print(f"Erro ao carregar entregas: {e}")
+            self.entregas_store = EntregasStore(":memory:", None)
+        self.atualizar_tarefas_visiveis()
 
 
     def setup_ui(self):
@@ -442,31 +738,79 @@ class CalendarTrackerApp:
         ttk.Button(button_frame, text="Carregar dar Url", command=self.carregar_eventos).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="+ Adicionar Evento Local", command=self.adicionar_evento_local).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Exportar CSV", command=self.exportar_csv).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Exportar Excel", command=self.exportar_xlsx).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Relatório de Sprints", command=self.gerar_relatorio_sprints).pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(button_frame, text="Conflitos:").pack(side=tk.LEFT, padx=(15, 5))
+        self.politica_var = tk.StringVar(value=engine.POLITICAS_CONFLITO[engine.POLITICA_PADRAO])
+        ttk.Combobox(
+            button_frame, textvariable=self.politica_var, state='readonly', width=14,
+            values=list(engine.POLITICAS_CONFLITO.values())
+        ).pack(side=tk.LEFT, padx=5)
+
+        self.auto_refresh_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            button_frame, text="Atualizar automaticamente", variable=self.auto_refresh_var,
+            command=self.alternar_atualizacao_automatica
+        ).pack(side=tk.LEFT, padx=(15, 5))
+        self.status_atualizacao_label = ttk.Label(button_frame, text="", foreground='gray')
+        self.status_atualizacao_label.pack(side=tk.LEFT, padx=5)
 
         # Resultado
         self.resultado_label = ttk.Label(mainframe, text="Tempo total: 0h00m | Minutos excedentes: 0 | Eventos selecionados: 0")
         self.resultado_label.grid(row=3, column=0, columnspan=5, pady=5)
 
+        # Progresso do carregamento em segundo plano
+        self.progresso_frame = ttk.Frame(mainframe)
+        self.progresso_frame.grid(row=5, column=0, columnspan=5, sticky=(tk.W, tk.E), pady=5)
+        self.progresso_bar = ttk.Progressbar(self.progresso_frame, mode='indeterminate', length=200)
+        self.progresso_bar.pack(side=tk.LEFT, padx=5)
+        self.progresso_label = ttk.Label(self.progresso_frame, text="")
+        self.progresso_label.pack(side=tk.LEFT, padx=5)
+        ttk.Button(self.progresso_frame, text="Cancelar", command=self.cancelar_carregamento).pack(side=tk.LEFT, padx=5)
+        self.progresso_frame.grid_remove()
+
         # Lista de eventos com scroll
         self.container = ttk.Frame(mainframe)
         self.container.grid(row=4, column=0, columnspan=5, sticky='nsew')
 
-        self.canvas = tk.Canvas(self.container, borderwidth=0, highlightthickness=0)
-        self.scrollbar = ttk.Scrollbar(self.container, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = ttk.Frame(self.canvas)
-
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(
-                scrollregion=self.canvas.bbox("all")
-            )
-        )
+        # Treeview só desenha as linhas visíveis, então aguenta milhares de eventos
+        colunas = ('sel', 'tipo', 'horario', 'duracao', 'excedentes', 'descricao')
+        self.event_tree = ttk.Treeview(self.container, columns=colunas, show='headings', selectmode='browse', height=20)
+        self.event_tree.heading('sel', text="✔")
+        self.event_tree.heading('tipo', text="")
+        self.event_tree.heading('horario', text="Horário")
+        self.event_tree.heading('duracao', text="Duração")
+        self.event_tree.heading('excedentes', text="Excedentes")
+        self.event_tree.heading('descricao', text="Descrição")
+        self.event_tree.column('sel', width=30, minwidth=30, stretch=False, anchor=tk.CENTER)
+        self.event_tree.column('tipo', width=30, minwidth=30, stretch=False, anchor=tk.CENTER)
+        self.event_tree.column('horario', width=170, minwidth=150, stretch=False)
+        self.event_tree.column('duracao', width=80, minwidth=60, stretch=False, anchor=tk.CENTER)
+        self.event_tree.column('excedentes', width=80, minwidth=60, stretch=False, anchor=tk.CENTER)
+        self.event_tree.column('descricao', width=400, minwidth=150, stretch=True)
+
+        self.scrollbar = ttk.Scrollbar(self.container, orient="vertical", command=self.event_tree.yview)
+        self.event_tree.configure(yscrollcommand=self.ao_rolar_lista)
+
+        self.event_tree.bind('<Button-1>', self.ao_clicar_evento)
+        self.event_tree.bind('<Double-1>', self.ao_duplo_clique_evento)
+        self.event_tree.bind('<space>', self.ao_pressionar_espaco)
+        self.event_tree.bind('<Delete>', lambda e: self.remover_evento_local())
+        self.event_tree.bind('<Button-3>', self.mostrar_menu_evento)
+
+        self.event_tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
 
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        ttk.Label(
+            mainframe,
+            text="Clique em ✔ para marcar/desmarcar • Duplo clique em Excedentes para editar • Botão direito para mais opções",
+            foreground='gray'
+        ).grid(row=6, column=0, columnspan=5, sticky=tk.W)
 
-        self.canvas.pack(side="left", fill="both", expand=True)
-        self.scrollbar.pack(side="right", fill="y")
+        # Barra de status: tempos por etapa e contadores do último carregamento (perfil.py)
+        self.perfil_label = ttk.Label(mainframe, text="", foreground='gray')
+        self.perfil_label.grid(row=7, column=0, columnspan=5, sticky=tk.W)
 
         # Configurar pesos da grade
         mainframe.columnconfigure(1, weight=1)
@@ -484,9 +828,11 @@ class CalendarTrackerApp:
 
         self.task_listbox = tk.Listbox(self.task_tab, width=80, height=15)
         self.task_listbox.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        self.task_listbox.bind('<Delete>', self.remover_tarefa)
 
-        self.task_file = "sprint_tasks.json"
-        self.carregar_tarefas()
+        self.task_file = "sprint_tasks.json"  # Legado: importado para o banco
+        self.entregas_store = None  # Entregas (EntregasStore), aberto em carregar_dados_iniciais
+        self.ids_tarefas_visiveis = []
 
     
     def carregar_config(self):
@@ -494,417 +840,207 @@ class CalendarTrackerApp:
             try:
                 with open(self.config_file, 'r') as f:
                     config = json.load(f)
+                    self.config = config
                     self.url_entry.insert(0, config.get('url', ''))
+                    politica = config.get('politica_conflito', engine.POLITICA_PADRAO)
+                    self.politica_var.set(engine.POLITICAS_CONFLITO.get(politica, engine.POLITICAS_CONFLITO[engine.POLITICA_PADRAO]))
+                    self.auto_refresh_var.set(config.get('auto_refresh', False))
                     if 'last_date' in config:
                         self.date_picker.set_date(datetime.strptime(config['last_date'], '%Y-%m-%d').date())
             except Exception as e:
                 print(f"Erro ao carregar configuração: {e}")
     
+
     def salvar_config(self):
         try:
-            config = {
+            self.config.update({
                 'url': self.url_entry.get(),
-                'last_date': self.date_picker.get_date().strftime('%Y-%m-%d')
-            }
+                'last_date': self.date_picker.get_date().strftime('%Y-%m-%d'),
+                'politica_conflito': self.politica_atual(),
+                'auto_refresh': self.auto_refresh_var.get()
+            })
             with open(self.config_file, 'w') as f:
-                json.dump(config, f)
+                json.dump(self.config, f)
         except Exception as e:
             print(f"Erro ao salvar configuração: {e}")
     
+
     def carregar_eventos(self):
         url = self.url_entry.get().strip()
+
+        # Carregar eventos do calendário se houver URL
+        if url:
+            self.iniciar_carregamento(
+                lambda: self.abrir_url(url),
+                "Falha ao carregar calendário",
+                exibir_em_erro=True
+            )
+            return
+
         try:
-            data_inicio = self.date_picker.get_date()
-            if self.two_weeks_var.get():
-                data_fim = data_inicio + timedelta(days=13)
-            else:
-                data_fim = self.end_date_picker.get_date()
+            data_inicio, data_fim = self.periodo_atual()
         except Exception as e:
             messagebox.showerror("Erro", f"Data inválida: {str(e)}")
             return
-        
-        # Limpar frame de eventos
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        
-        self.check_vars = []
-        self.eventos_atuais = []
-        
-        # Carregar eventos do calendário se houver URL
-        if url:
-            try:
-                if not url.startswith(('http://', 'https://')):
-                    url = 'https://' + url
-                    
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                calendario = Calendar.from_ical(response.content)
-                eventos_calendario = self.processar_calendario(calendario, data_inicio, data_fim)
-                eventos_calendario = self.aplicar_filtros(eventos_calendario)
-                self.eventos_atuais.extend(eventos_calendario)
-            except Exception as e:
-                messagebox.showerror("Erro", f"Falha ao carregar calendário: {str(e)}")
-        
-        # Carregar eventos locais dentro do período
-        eventos_locais_periodo = []
-        for event in self.local_events:
-            start_date = event['start'].date()
-            if data_inicio <= start_date <= data_fim:
-                eventos_locais_periodo.append(event)
-        
+
+        self.cancelar_carregamento()
         self.salvar_config()
-        
-        # Adicionar eventos do calendário
-        for inicio, fim, descricao in sorted(self.eventos_atuais, key=lambda x: x[0]):
-            # Criar chave única para o evento
-            inicio_br = inicio.astimezone(self.tz_brasil)
-            event_key = f"{inicio_br.strftime('%Y%m%d%H%M')}_{descricao}"
-            
-            # Obter minutos excedentes salvos
-            excess_min = self.excess_minutes.get(event_key, 0)
-            
-            self.adicionar_evento_na_interface(inicio, fim, descricao, False, excess_min)
-        
-        for event in sorted(eventos_locais_periodo, key=lambda x: x['start']):
-            self.adicionar_evento_na_interface(
-                event['start'], 
-                event['end'], 
-                event['description'], 
-                True,
-                event.get('excess_minutes', 0)  # Usar .get() para evitar KeyError
-            )
-        
+        self.exibir_eventos([], data_inicio, data_fim)
+
+    def adicionar_evento_na_interface(self, inicio, fim, descricao, is_local, excess_minutes=0, local_event=None,
+                                      chave=None, inicio_local=None):
+        """Adiciona um evento à lista, seja do calendário ou local"""
+        evento_id = self.modelo.adicionar(inicio, fim, descricao, is_local, excess_minutes, local_event, chave,
+                                          inicio_local)
+        return self.event_tree.insert('', tk.END, iid=str(evento_id), values=self.valores_linha(self.modelo[evento_id]))
+
+    def valores_linha(self, evento):
+        """Valores das colunas da Treeview para um evento"""
+        # Horário local já convertido no modelo (eventos locais já são naive)
+        inicio_display = evento.inicio_local
+        fim_display = evento.fim_local
+
+        return (
+            MARCADO if evento.selecionado else DESMARCADO,
+            "📌" if evento.is_local else "",
+            f"{inicio_display.strftime('%Y-%m-%d %H:%M')} → {fim_display.strftime('%H:%M')}",
+            engine.formatar_duracao(evento.minutos),
+            evento.excess_minutes,
+            evento.descricao,
+        )
+
+    def ao_clicar_evento(self, event):
+        """Clique na coluna de seleção marca/desmarca o evento"""
+        if self.event_tree.identify_region(event.x, event.y) != 'cell':
+            return None
+        iid = self.event_tree.identify_row(event.y)
+        if iid and self.event_tree.identify_column(event.x) == '#1':
+            self.alternar_selecao(iid)
+            return "break"
+        return None
+
+    def ao_duplo_clique_evento(self, event):
+        iid = self.event_tree.identify_row(event.y)
+        if iid and self.event_tree.identify_column(event.x) == '#5':
+            self.abrir_editor_excedentes(iid)
+
+    def ao_pressionar_espaco(self, event):
+        iid = self.event_tree.focus()
+        if iid:
+            self.alternar_selecao(iid)
+        return "break"
+
+    def mostrar_menu_evento(self, event):
+        iid = self.event_tree.identify_row(event.y)
+        if not iid:
+            return
+        self.event_tree.focus(iid)
+        self.event_tree.selection_set(iid)
+        menu = tk.Menu(self.root, tearoff=0)
+        menu.add_command(label="Marcar/Desmarcar", command=lambda: self.alternar_selecao(iid))
+        menu.add_command(label="Editar excedentes", command=lambda: self.abrir_editor_excedentes(iid))
+        if self.modelo[int(iid)].is_local:
+            menu.add_separator()
+            menu.add_command(label="Remover evento local", command=lambda: self.remover_evento_local(iid))
+        menu.tk_popup(event.x_root, event.y_root)
+
+    def alternar_selecao(self, iid):
+        evento = self.modelo.alternar_selecao(int(iid))
+        self.event_tree.set(iid, 'sel', MARCADO if evento.selecionado else DESMARCADO)
         self.calcular_total()
-        self.atualizar_tarefas_visiveis()
-    
-    def adicionar_evento_na_interface(self, inicio, fim, descricao, is_local, excess_minutes=0):
-        """Adiciona um evento à interface, seja do calendário ou local"""
-        var = tk.IntVar(value=1)
-        self.check_vars.append(var)
-        
-        duracao = fim - inicio
-        minutos = int(duracao.total_seconds() // 60)
-        horas_duracao = minutos // 60
-        mins_duracao = minutos % 60
-        
-        # Formatar duração
-        if horas_duracao > 0:
-            duracao_str = f"{horas_duracao}h{mins_duracao:02d}m"
-        else:
-            duracao_str = f"{mins_duracao}m"
-        
-        # Converter para horário de Brasília se for evento do calendário
-        if not is_local:
-            inicio_br = inicio.astimezone(self.tz_brasil)
-            fim_br = fim.astimezone(self.tz_brasil)
-            inicio_display = inicio_br
-            fim_display = fim_br
-        else:
-            inicio_display = inicio
-            fim_display = fim
-        
-        frame = ttk.Frame(self.scrollable_frame)
-        frame.pack(fill='x', padx=5, pady=2)
-        
-        # Armazenar dados do evento no frame
-        if is_local:
-            frame.local_event_data = {
-                'start': inicio,
-                'end': fim,
-                'description': descricao,
-                'excess_minutes': excess_minutes
-            }
-        else:
-            frame.event_data = (inicio, fim, descricao)
-        
-        # Checkbox
-        cb = ttk.Checkbutton(frame, variable=var, command=self.calcular_total)
-        cb.pack(side='left')
 
-        frame.check_var = var
-        
-        # Ícone para identificar eventos locais
-        if is_local:
-            ttk.Label(frame, text="📌", font=('Arial', 10)).pack(side='left', padx=2)
-        
-        # Data e hora
-        ttk.Label(frame, text=f"{inicio_display.strftime('%Y-%m-%d %H:%M')} → {fim_display.strftime('%H:%M')}").pack(side='left', padx=5)
-        
-        # Duração
-        ttk.Label(frame, text=duracao_str, width=10).pack(side='left', padx=5)
-        
-        # Minutos excedentes
-        ttk.Label(frame, text="Excedentes:").pack(side='left', padx=5)
-        excess_spin = ttk.Spinbox(frame, from_=0, to=999, width=5)
-        excess_spin.set(excess_minutes)
-        excess_spin.pack(side='left', padx=5)
-        excess_spin.bind('<FocusOut>', lambda e, f=frame: self.atualizar_minutos_excedentes(f, is_local))
-        excess_spin.bind('<Return>', lambda e, f=frame: self.atualizar_minutos_excedentes(f, is_local))
-        
-        # Armazenar referência ao Spinbox no frame
-        frame.excess_spin = excess_spin
-        
-        # Descrição do evento
-        ttk.Label(frame, text=descricao, wraplength=400).pack(side='left', padx=5, fill='x', expand=True)
-        
-        # Botão para remover evento local
-        if is_local:
-            def remover_evento():
-                if messagebox.askyesno("Confirmar", "Deseja remover este evento local permanentemente?"):
-                    # Remover da lista de eventos locais
-                    for i, event in enumerate(self.local_events):
-                        if (event['start'] == inicio and 
-                            event['end'] == fim and 
-                            event['description'] == descricao):
-                            del self.local_events[i]
-                            self.salvar_eventos_locais()
-                            break
-                    # Remover da interface
-                    frame.destroy()
-                    self.calcular_total()
-            
-            ttk.Button(frame, text="×", width=2, command=remover_evento).pack(side='right', padx=5)
-        
-        # Armazenar minutos totais no frame
-        frame.minutos_totais = minutos
-    
-    def atualizar_minutos_excedentes(self, frame, is_local):
+    def abrir_editor_excedentes(self, iid):
+        """Abre um Spinbox sobre a célula de excedentes (edição inline)"""
+        self.confirmar_edicao_excedentes()
+        self.event_tree.see(iid)
+        self.event_tree.update_idletasks()
+        bbox = self.event_tree.bbox(iid, 'excedentes')
+        if not bbox:
+            return
+        x, y, largura, altura = bbox
+
+        spin = ttk.Spinbox(self.event_tree, from_=0, to=999, width=5)
+        spin.set(self.modelo[int(iid)].excess_minutes)
+        spin.place(x=x, y=y, width=largura, height=altura)
+        spin.focus_set()
+        spin.selection_range(0, tk.END)
+        spin.bind('<Return>', lambda e: self.confirmar_edicao_excedentes())
+        spin.bind('<FocusOut>', lambda e: self.confirmar_edicao_excedentes())
+        spin.bind('<Escape>', lambda e: self.cancelar_edicao_excedentes())
+        self.editor_excedentes = (iid, spin)
+
+    def confirmar_edicao_excedentes(self):
+        if self.editor_excedentes is None:
+            return
+        iid, spin = self.editor_excedentes
+        valor = spin.get()
+        self.cancelar_edicao_excedentes()
+        if int(iid) in self.modelo:
+            self.atualizar_minutos_excedentes(iid, valor)
+
+    def cancelar_edicao_excedentes(self):
+        if self.editor_excedentes is None:
+            return
+        _, spin = self.editor_excedentes
+        self.editor_excedentes = None
+        spin.destroy()
+        self.event_tree.focus_set()
+
+    def ao_rolar_lista(self, primeiro, ultimo):
+        # O editor inline fica posicionado sobre a célula; se a lista rolar, confirmar e fechar
+        if (float(primeiro), float(ultimo)) != tuple(self.scrollbar.get()):
+            self.confirmar_edicao_excedentes()
+        self.scrollbar.set(primeiro, ultimo)
+
+    def remover_evento_local(self, iid=None):
+        """Remove permanentemente o evento local da linha (ou da linha com foco)"""
+        if iid is None:
+            iid = self.event_tree.focus()
+        if not iid or int(iid) not in self.modelo or not self.modelo[int(iid)].is_local:
+            return
+        if messagebox.askyesno("Confirmar", "Deseja remover este evento local permanentemente?"):
+            evento = self.modelo.remover(int(iid))
+            # Remover da lista de eventos locais
+            self.local_store.remover(evento.local_event['id'])
+            # Remover da interface
+            self.event_tree.delete(iid)
+            self.calcular_total()
+
+    def atualizar_minutos_excedentes(self, iid, valor):
         """Atualiza os minutos excedentes quando o valor é alterado"""
         try:
-            excess_min = int(frame.excess_spin.get())
-            
-            if is_local:
-                # Atualizar evento local
-                event_data = frame.local_event_data
-                event_data['excess_minutes'] = excess_min
-                
-                # Atualizar na lista principal
-                for event in self.local_events:
-                    if (event['start'] == event_data['start'] and 
-                        event['end'] == event_data['end'] and 
-                        event['description'] == event_data['description']):
-                        event['excess_minutes'] = excess_min
-                        break
-                
-                self.salvar_eventos_locais()
+            excess_min = int(valor)
+            evento = self.modelo.definir_excedentes(int(iid), excess_min)
+            self.event_tree.set(iid, 'excedentes', excess_min)
+
+            if evento.is_local:
+                # Atualizar só o registro do evento local
+                evento.local_event['excess_minutes'] = excess_min
+                self.local_store.atualizar_excedentes(evento.local_event['id'], excess_min)
             else:
-                # Atualizar evento do calendário
-                inicio, fim, descricao = frame.event_data
-                inicio_br = inicio.astimezone(self.tz_brasil)
-                
-                # Criar chave única para o evento
-                event_key = f"{inicio_br.strftime('%Y%m%d%H%M')}_{descricao}"
-                
-                # Atualizar dicionário e salvar
-                self.excess_minutes[event_key] = excess_min
-                self.salvar_minutos_excedentes()
-            
+                # Atualizar evento do calendário; a gravação em disco é agrupada
+                data_local = evento.inicio_local.date()
+                self.excedentes.definir(evento.chave, excess_min, data_local,
+                                        engine.chave_excedente(evento.inicio_local, evento.descricao))
+                self.agendar_gravacao_excedentes()
+
             # Recalcular totais
             self.calcular_total()
         except Exception as e:
             print(f"Erro ao atualizar minutos excedentes: {e}")
-    
-    def processar_calendario(self, calendario, data_inicio, data_fim):
-        eventos = []
-        
-        # Converter para datetime no início do dia
-        inicio_periodo = datetime.combine(data_inicio, datetime.min.time())
-        fim_periodo = datetime.combine(data_fim, datetime.max.time())  # Fim do último dia
-        
-        # Converter para UTC
-        inicio_periodo_utc = UTC.localize(inicio_periodo)
-        fim_periodo_utc = UTC.localize(fim_periodo)
-        
-        for componente in calendario.walk():
-            if componente.name != "VEVENT":
-                continue
-            
-            dtstart = componente.get('dtstart').dt
-            dtend = componente.get('dtend').dt
-            descricao = str(componente.get('summary', 'Sem descrição')).strip()
-            
-            # Pular eventos cancelados
-            if 'cancelado' in descricao.lower():
-                continue
-            
-            # Converter para datetime com timezone
-            if isinstance(dtstart, datetime):
-                if dtstart.tzinfo is None:
-                    dtstart = UTC.localize(dtstart)
-            else:
-                dtstart = UTC.localize(datetime.combine(dtstart, datetime.min.time()))
-            
-            if isinstance(dtend, datetime):
-                if dtend.tzinfo is None:
-                    dtend = UTC.localize(dtend)
-            else:
-                dtend = UTC.localize(datetime.combine(dtend, datetime.min.time()))
-            
-            # Processar eventos recorrentes
-            if 'RRULE' in componente:
-                try:
-                    rrule_str = componente['RRULE'].to_ical().decode('utf-8')
-                    
-                    # Corrigir o UNTIL no RRULE se necessário
-                    if 'UNTIL=' in rrule_str:
-                        parts = rrule_str.split(';')
-                        new_parts = []
-                        for part in parts:
-                            if part.startswith('UNTIL='):
-                                until_val = part[6:]
-                                if until_val.endswith('Z'):
-                                    until_val = until_val[:-1]
-                                try:
-                                    until_dt = datetime.strptime(until_val, '%Y%m%dT%H%M%S')
-                                except ValueError:
-                                    until_dt = datetime.strptime(until_val, '%Y%m%d')
-                                until_dt = UTC.localize(until_dt)
-                                part = f"UNTIL={until_dt.strftime('%Y%m%dT%H%M%SZ')}"
-                            new_parts.append(part)
-                        rrule_str = ';'.join(new_parts)
-                    
-                    rule = rrulestr(rrule_str, dtstart=dtstart)
-                    
-                    # Processar EXDATEs (exceções)
-                    exdates = []
-                    if 'EXDATE' in componente:
-                        exdate = componente['EXDATE']
-                        if isinstance(exdate, list):
-                            for ex in exdate:
-                                exdates.extend([d.dt for d in ex.dts])
-                        else:
-                            exdates = [d.dt for d in exdate.dts]
-                    
-                    # Converter exdates para UTC
-                    exdates = [UTC.localize(ex) if isinstance(ex, datetime) and ex.tzinfo is None 
-                             else ex for ex in exdates]
-                    
-                    # Obter ocorrências dentro do período exato de 14 dias
-                    for occurrence in rule.between(inicio_periodo_utc, fim_periodo_utc, inc=True):
-                        if isinstance(occurrence, datetime):
-                            if occurrence.tzinfo is None:
-                                occurrence = UTC.localize(occurrence)
-                            
-                            # Verificar se não está nas exceções
-                            if not any(abs((occurrence - exdate).total_seconds()) < 60 for exdate in exdates):
-                                event_end = occurrence + (dtend - dtstart)
-                                if event_end > occurrence:  # Verificar se a duração é válida
-                                    eventos.append((occurrence, event_end, descricao))
-                    
-                except Exception as e:
-                    print(f"Erro ao processar evento recorrente {descricao}: {str(e)}")
-                    continue
-            else:
-                # Evento único - verificar se está dentro do período de 14 dias
-                if inicio_periodo_utc <= dtstart <= fim_periodo_utc:
-                    eventos.append((dtstart, dtend, descricao))
-        
-        return eventos
-    
-    def aplicar_filtros(self, eventos):
-        # Primeiro, remove eventos cancelados
-        eventos_validos = [e for e in eventos if 'cancelado' not in e[2].lower()]
-        
-        # Agrupa eventos por data
-        eventos_por_data = {}
-        for evento in eventos_validos:
-            data = evento[0].astimezone(self.tz_brasil).date()
-            eventos_por_data.setdefault(data, []).append(evento)
-        
-        # Processa cada dia para resolver conflitos
-        eventos_filtrados = []
-        
-        for data, eventos_dia in eventos_por_data.items():
-            # Ordena eventos por horário de início
-            eventos_dia.sort(key=lambda x: x[0])
-            
-            i = 0
-            while i < len(eventos_dia):
-                current_start, current_end, current_desc = eventos_dia[i]
-                max_duration = current_end - current_start
-                final_desc = current_desc
-                j = i + 1
-                
-                # Encontra todos os eventos sobrepostos
-                while j < len(eventos_dia):
-                    next_start, next_end, next_desc = eventos_dia[j]
-                    
-                    # Verifica se há sobreposição
-                    if next_start >= current_end:
-                        break
-                    
-                    # Atualiza para pegar o término mais tarde
-                    current_end = max(current_end, next_end)
-                    
-                    # Verifica qual tem maior duração para pegar a descrição
-                    next_duration = next_end - next_start
-                    if next_duration > max_duration:
-                        max_duration = next_duration
-                        final_desc = next_desc
-                    
-                    j += 1
-                
-                # Adiciona o evento consolidado
-                eventos_filtrados.append((current_start, current_end, final_desc))
-                i = j
-        
-        return eventos_filtrados
-    
+
     def calcular_total(self):
-        total_minutos = 0
-        total_excess = 0
-        eventos_selecionados = 0
-        
-        for frame in self.scrollable_frame.winfo_children():
-            if hasattr(frame, 'minutos_totais'):
-                for widget in frame.winfo_children():
-                    if isinstance(widget, ttk.Checkbutton):
-                        if widget.instate(['selected']):
-                            total_minutos += frame.minutos_totais
-                            try:
-                                total_excess += int(frame.excess_spin.get())
-                            except:
-                                pass
-                            eventos_selecionados += 1
-                        break
-        
-        # Formatar igual à lista (ex: 2h30m)
-        horas = total_minutos // 60
-        minutos = total_minutos % 60
-        
-        if horas > 0:
-            total_str = f"{horas}h{minutos:02d}m"
-        else:
-            total_str = f"{minutos}m"
-        
-        # Formatar minutos excedentes
-        excess_horas = total_excess // 60
-        excess_mins = total_excess % 60
-        
-        if excess_horas > 0:
-            excess_str = f"{excess_horas}h{excess_mins:02d}m"
-        else:
-            excess_str = f"{excess_mins}m"
-        
-        # Tempo previsto
-        horas = total_minutos // 60
-        minutos = total_minutos % 60
-        tempo_previsto_str = f"{horas}h{minutos:02d}m" if horas > 0 else f"{minutos}m"
-
-        # Excedidos
-        excess_horas = total_excess // 60
-        excess_mins = total_excess % 60
-        excedidos_str = f"{excess_horas}h{excess_mins:02d}m" if excess_horas > 0 else f"{excess_mins}m"
-
-        # Total final
-        total_final = total_minutos + total_excess
-        final_horas = total_final // 60
-        final_mins = total_final % 60
-        tempo_total_str = f"{final_horas}h{final_mins:02d}m" if final_horas > 0 else f"{final_mins}m"
-
-        self.resultado_label.config(
-            text=f"Tempo previsto: {tempo_previsto_str} | Excedidos: {excedidos_str} | Tempo Total: {tempo_total_str}"
-        )
+        """Agenda a atualização do label de totais; rajadas de mudanças viram uma só atualização"""
+        if self.totais_agendados is None:
+            self.totais_agendados = self.root.after_idle(self.atualizar_label_totais)
+
+    def atualizar_label_totais(self):
+        self.totais_agendados = None
+        with PERFIL.span("calcular_total"):
+            totais = self.modelo.totais.como_dict()
+            # Somas vêm dos contadores O(1); a união usa os arrays guardados no modelo
+            totais['total_sem_sobreposicao'] = self.modelo.minutos_sem_sobreposicao()
+        self.resultado_label.config(text=engine.texto_totais(totais))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+"""Armazenamento indexado por data em SQLite (eventos locais e entregas)."""
+import json
+import os
+import sqlite3
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+FORMATO_DATA = '%Y-%m-%d %H:%M'
+
+
+class BancoSQLite:
+    """Conexão com o banco do app e a tabela meta (marcas de migração)
+
+    Com `somente_leitura`, o arquivo é aberto em modo ro e copiado para a
+    memória: criação de tabelas, importação do JSON legado e gravações
+    acontecem só na cópia.
+    """
+
+    def __init__(self, caminho_db="sprint_tracker.db", somente_leitura=False):
+        self.caminho_db = caminho_db
+        if somente_leitura:
+            self.conn = sqlite3.connect(":memory:")
+            if os.path.exists(caminho_db):
+                origem = sqlite3.connect(f"{Path(caminho_db).resolve().as_uri()}?mode=ro", uri=True)
+                try:
+                    origem.backup(self.conn)
+                finally:
+                    origem.close()
+        else:
+            self.conn = sqlite3.connect(caminho_db)
+        self.conn.row_factory = sqlite3.Row
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    chave TEXT PRIMARY KEY,
+                    valor TEXT
+                )
+            """)
+
+    def _meta(self, chave):
+        row = self.conn.execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        return row['valor'] if row else None
+
+    def _definir_meta(self, chave, valor):
+        self.conn.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)", (chave, valor))
+
+    def fechar(self):
+        self.conn.close()
+
+
+class LocalEventStore(BancoSQLite):
+    """Eventos locais em SQLite com índice por início
+
+    Consultas por período usam o índice (O(log n)) e cada inclusão, edição
+    ou remoção grava só o registro afetado. Na primeira abertura, o
+    local_events.json antigo é importado automaticamente.
+    """
+
+    def __init__(self, caminho_db="sprint_tracker.db", json_legado="local_events.json", somente_leitura=False):
+        super().__init__(caminho_db, somente_leitura)
+        self.json_legado = json_legado
+        self._criar_tabelas()
+        self.importar_json_legado()
+
+    def _criar_tabelas(self):
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS local_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    start TEXT NOT NULL,
+                    end TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    excess_minutes INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_local_events_start ON local_events(start)")
+
+    def importar_json_legado(self):
+        """Importa local_events.json uma única vez (o arquivo é mantido como backup)"""
+        if self._meta('local_events_json_importado') or not self.json_legado:
+            return
+        eventos = []
+        if os.path.exists(self.json_legado):
+            try:
+                with open(self.json_legado, 'r') as f:
+                    eventos = json.load(f)
+            except Exception as e:
+                print(f"Erro ao importar eventos locais: {e}")
+                return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO local_events (start, end, description, excess_minutes) VALUES (?, ?, ?, ?)",
+                [(e['start'], e['end'], e['description'], e.get('excess_minutes', 0)) for e in eventos]
+            )
+            self._definir_meta('local_events_json_importado', datetime.now().strftime(FORMATO_DATA))
+
+    @staticmethod
+    def _para_dict(row):
+        return {
+            'id': row['id'],
+            'start': datetime.strptime(row['start'], FORMATO_DATA),
+            'end': datetime.strptime(row['end'], FORMATO_DATA),
+            'description': row['description'],
+            'excess_minutes': row['excess_minutes'],
+        }
+
+    def no_periodo(self, data_inicio, data_fim):
+        """Eventos cujo início cai entre data_inicio e data_fim (inclusive), ordenados por início"""
+        limite_inicio = datetime.combine(data_inicio, datetime.min.time()).strftime(FORMATO_DATA)
+        limite_fim = datetime.combine(data_fim + timedelta(days=1), datetime.min.time()).strftime(FORMATO_DATA)
+        rows = self.conn.execute(
+            "SELECT * FROM local_events WHERE start >= ? AND start < ? ORDER BY start, id",
+            (limite_inicio, limite_fim)
+        )
+        return [self._para_dict(row) for row in rows]
+
+    def inserir(self, event):
+        """Grava um novo evento e preenche event['id']"""
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO local_events (start, end, description, excess_minutes) VALUES (?, ?, ?, ?)",
+                (event['start'].strftime(FORMATO_DATA), event['end'].strftime(FORMATO_DATA),
+                 event['description'], event.get('excess_minutes', 0))
+            )
+        event['id'] = cursor.lastrowid
+        return event['id']
+
+    def atualizar_excedentes(self, event_id, excess_minutes):
+        with self.conn:
+            self.conn.execute("UPDATE local_events SET excess_minutes = ? WHERE id = ?", (excess_minutes, event_id))
+
+    def remover(self, event_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM local_events WHERE id = ?", (event_id,))
+
+
+class EntregasStore(BancoSQLite):
+    """Entregas da sprint com id próprio e índice ordenado por data
+
+    O índice (data, id) fica em memória, então a consulta de uma sprint é um
+    bisect; cada inclusão ou remoção grava só o registro afetado. Entregas
+    com o mesmo texto são entregas distintas. Na primeira abertura, o
+    sprint_tasks.json antigo é importado automaticamente.
+    """
+
+    def __init__(self, caminho_db="sprint_tracker.db", json_legado="sprint_tasks.json", somente_leitura=False):
+        super().__init__(caminho_db, somente_leitura)
+        self.json_legado = json_legado
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS entregas (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    data TEXT NOT NULL,
+                    tarefa TEXT NOT NULL
+                )
+            """)
+        self.importar_json_legado()
+        self.tarefas = {}  # id -> (data 'YYYY-MM-DD', tarefa)
+        self.indice = []   # (data, id) ordenado
+        for row in self.conn.execute("SELECT id, data, tarefa FROM entregas ORDER BY data, id"):
+            self.tarefas[row['id']] = (row['data'], row['tarefa'])
+            self.indice.append((row['data'], row['id']))
+
+    def importar_json_legado(self):
+        """Importa sprint_tasks.json ([{"text", "date"}]) uma única vez (o arquivo é mantido como backup)"""
+        if self._meta('sprint_tasks_json_importado') or not self.json_legado:
+            return
+        registros = []
+        if os.path.exists(self.json_legado):
+            try:
+                with open(self.json_legado, 'r', encoding='utf-8') as f:
+                    tarefas = json.load(f)
+            except Exception as e:
+                print(f"Erro ao importar entregas: {e}")
+                return
+            for t in tarefas:
+                try:
+                    registros.append((date.fromisoformat(t["date"]).isoformat(), t["text"]))
+                except Exception as e:
+                    print(f"Erro ao importar entrega '{t.get('text')}': {e}")
+        with self.conn:
+            self.conn.executemany("INSERT INTO entregas (data, tarefa) VALUES (?, ?)", registros)
+            self._definir_meta('sprint_tasks_json_importado', datetime.now().strftime(FORMATO_DATA))
+
+    def no_periodo(self, data_inicio, data_fim):
+        """(id, data, tarefa) das entregas entre data_inicio e data_fim (inclusive), ordenadas por data"""
+        a = bisect_left(self.indice, (data_inicio.isoformat(),))
+        b = bisect_right(self.indice, (data_fim.isoformat(), float('inf')))
+        return [(entrega_id, data_str, self.tarefas[entrega_id][1]) for data_str, entrega_id in self.indice[a:b]]
+
+    def inserir(self, data_entrega, tarefa):
+        data_str = data_entrega.isoformat()
+        with self.conn:
+            cursor = self.conn.execute("INSERT INTO entregas (data, tarefa) VALUES (?, ?)", (data_str, tarefa))
+        entrega_id = cursor.lastrowid
+        self.tarefas[entrega_id] = (data_str, tarefa)
+        self.indice.insert(bisect_right(self.indice, (data_str, entrega_id)), (data_str, entrega_id))
+        return entrega_id
+
+    def remover(self, entrega_id):
+        data_str, _ = self.tarefas.pop(entrega_id)
+        del self.indice[bisect_left(self.indice, (data_str, entrega_id))]
+        with self.conn:
+            self.conn.execute("DELETE FROM entregas WHERE id = ?", (entrega_id,))
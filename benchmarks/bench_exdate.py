@@ -0,0 +1,49 @@
+"""Benchmark: exclusão de EXDATE por varredura linear vs IndiceExdates.
+
+Uso: python benchmarks/bench_exdate.py
+"""
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pytz import UTC  # noqa: E402
+
+from recorrencias import IndiceExdates  # noqa: E402
+
+
+def serie(n_ocorrencias, n_exdates):
+    """Série diária com uma exceção a cada poucas ocorrências"""
+    inicio = UTC.localize(datetime(2020, 1, 1, 12, 0))
+    ocorrencias = [inicio + timedelta(days=i) for i in range(n_ocorrencias)]
+    passo = max(1, n_ocorrencias // max(1, n_exdates))
+    exdates = [inicio + timedelta(days=i) for i in range(0, n_ocorrencias, passo)][:n_exdates]
+    return ocorrencias, exdates
+
+
+def linear(ocorrencias, exdates):
+    return [o for o in ocorrencias
+            if not any(abs((o - ex).total_seconds()) < 60 for ex in exdates)]
+
+
+def indexado(ocorrencias, exdates):
+    indice = IndiceExdates(exdates)
+    return [o for o in ocorrencias if not indice.contem(o)]
+
+
+def main():
+    print(f"{'ocorrências':>12} {'exdates':>8} {'linear (ms)':>12} {'índice (ms)':>12} {'ganho':>8}")
+    for n_ocorrencias, n_exdates in [(250, 10), (1000, 100), (1000, 500), (2000, 1000)]:
+        ocorrencias, exdates = serie(n_ocorrencias, n_exdates)
+        assert linear(ocorrencias, exdates) == indexado(ocorrencias, exdates)
+        repeticoes = 3
+        t_linear = min(timeit.repeat(lambda: linear(ocorrencias, exdates), number=1, repeat=repeticoes))
+        t_indice = min(timeit.repeat(lambda: indexado(ocorrencias, exdates), number=1, repeat=repeticoes))
+        print(f"{n_ocorrencias:>12} {n_exdates:>8} {t_linear * 1000:>12.2f} {t_indice * 1000:>12.2f} "
+              f"{t_linear / t_indice:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark: junção de conflitos por dia (implementação antiga) vs varredura única.
+
+Uso: python benchmarks/bench_merge.py [n_intervalos]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pytz import UTC, timezone  # noqa: E402
+
+import sprint_engine as engine  # noqa: E402
+
+
+def aplicar_filtros_por_dia(eventos, tz):
+    """Implementação anterior: agrupa por data local e junta dentro de cada dia"""
+    eventos_validos = [e for e in eventos if 'cancelado' not in e[2].lower()]
+
+    eventos_por_data = {}
+    for evento in eventos_validos:
+        data = evento[0].astimezone(tz).date()
+        eventos_por_data.setdefault(data, []).append(evento)
+
+    eventos_filtrados = []
+    for data, eventos_dia in eventos_por_data.items():
+        eventos_dia.sort(key=lambda x: x[0])
+        i = 0
+        while i < len(eventos_dia):
+            current_start, current_end, current_desc, current_chave = eventos_dia[i]
+            max_duration = current_end - current_start
+            final_desc = current_desc
+            final_chave = current_chave
+            j = i + 1
+            while j < len(eventos_dia):
+                next_start, next_end, next_desc, next_chave = eventos_dia[j]
+                if next_start >= current_end:
+                    break
+                current_end = max(current_end, next_end)
+                next_duration = next_end - next_start
+                if next_duration > max_duration:
+                    max_duration = next_duration
+                    final_desc = next_desc
+                    final_chave = next_chave
+                j += 1
+            eventos_filtrados.append((current_start, current_end, final_desc, final_chave))
+            i = j
+    return eventos_filtrados
+
+
+def gerar_intervalos(n, semente=42):
+    """Reuniões de 15 a 120 minutos espalhadas em horário comercial, com sobreposições"""
+    aleatorio = random.Random(semente)
+    base = UTC.localize(datetime(2024, 1, 1, 11, 0))
+    dias = max(1, n // 8)
+    eventos = []
+    for i in range(n):
+        inicio = base + timedelta(days=aleatorio.randrange(dias), minutes=15 * aleatorio.randrange(48))
+        fim = inicio + timedelta(minutes=aleatorio.choice([15, 30, 45, 60, 90, 120]))
+        eventos.append((inicio, fim, f"Reunião {i % 500}", f"uid-{i}|x"))
+    return eventos
+
+
+def medir(funcao, *args, repeticoes=3):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return melhor, resultado
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    tz = timezone(engine.TZ_PADRAO)
+    eventos = gerar_intervalos(n)
+
+    t_antigo, antigo = medir(aplicar_filtros_por_dia, list(eventos), tz)
+    print(f"{n} intervalos")
+    print(f"{'por dia (antigo)':>20}: {t_antigo * 1000:8.1f} ms -> {len(antigo)} blocos")
+    for politica in engine.POLITICAS_CONFLITO:
+        t, resultado = medir(engine.aplicar_filtros, list(eventos), politica)
+        print(f"{politica:>20}: {t * 1000:8.1f} ms -> {len(resultado)} blocos ({t_antigo / t:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Benchmark do pipeline completo sobre feeds sintéticos, comparado a uma linha de base.
+
+Para cada escala gera um feed com gerar_ics (offline, determinístico) e roda
+parse -> processar_calendario -> aplicar_filtros -> agregação -> exportação
+CSV sobre uma janela de seis sprints. Registra o tempo de cada etapa (melhor
+de N repetições), o pico de memória (tracemalloc, numa execução à parte) e
+um resumo do resultado (contagens, totais e hash do CSV).
+
+A comparação com benchmarks/baseline_pipeline.json falha (código 1) se o
+resultado mudar ou se o tempo total passar da tolerância. Os tempos da base
+são da máquina em que foi gravada: regrave com --gravar ao trocar de máquina.
+
+Uso: python benchmarks/bench_pipeline.py [--escalas 250 1000 4000 16000] [--repeticoes 3]
+                                         [--tolerancia 1.5] [--gravar]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import agregacao  # noqa: E402
+import exportacao  # noqa: E402
+import sprint_engine as engine  # noqa: E402
+from fuso import ConversorFuso  # noqa: E402
+from modelo_eventos import ModeloEventos  # noqa: E402
+from recorrencias import CacheRecorrencias  # noqa: E402
+from gerar_ics import gerar_feed  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_pipeline.json')
+ESCALAS_PADRAO = (250, 1000, 4000, 16000)
+JANELA = (date(2025, 1, 6), date(2025, 3, 30))  # Seis sprints de duas semanas
+ETAPAS = ('parse', 'expansao', 'filtros', 'agregacao', 'exportacao')
+
+
+def executar(ics_data, diretorio, tempos=None):
+    """Roda o pipeline uma vez; devolve o resumo do resultado e guarda em `tempos` o menor tempo de cada etapa"""
+    marcas = [time.perf_counter()]
+
+    def etapa():
+        marcas.append(time.perf_counter())
+
+    data_inicio, data_fim = JANELA
+    calendario = engine.parse_calendario(ics_data, data_inicio, data_fim)
+    etapa()
+    # Cache de regras novo: cada repetição compila as RRULE do zero
+    ocorrencias = engine.processar_calendario(calendario, data_inicio, data_fim,
+                                              cache_recorrencias=CacheRecorrencias())
+    etapa()
+    eventos = engine.aplicar_filtros(ocorrencias)
+    etapa()
+    fuso = ConversorFuso(engine.TZ_PADRAO)
+    modelo = ModeloEventos(fuso)
+    for inicio, fim, descricao, chave in eventos:
+        modelo.adicionar(inicio, fim, descricao, False, chave=chave)
+    totais = agregacao.agregar_eventos(modelo.selecionados())
+    etapa()
+    caminho = os.path.join(diretorio, 'sprint.csv')
+    exportacao.escrever_csv(caminho, modelo.selecionados(), [])
+    etapa()
+
+    if tempos is not None:
+        for nome, (antes, depois) in zip(ETAPAS, zip(marcas, marcas[1:])):
+            tempos[nome] = min(tempos.get(nome, float('inf')), (depois - antes) * 1000)
+    with open(caminho, 'rb') as f:
+        hash_csv = hashlib.sha256(f.read()).hexdigest()
+    return {
+        'vevents': len(calendario.walk('VEVENT')),
+        'ocorrencias': len(ocorrencias),
+        'eventos': len(eventos),
+        'total_minutos': int(totais['total_minutos']),
+        'total_sem_sobreposicao': int(totais['total_sem_sobreposicao']),
+        'csv_sha256': hash_csv,
+    }
+
+
+def medir(n_eventos, repeticoes, diretorio):
+    ics_data = gerar_feed(n_eventos)
+    tempos = {}
+    for _ in range(repeticoes):
+        resultado = executar(ics_data, diretorio, tempos)
+
+    tracemalloc.start()
+    executar(ics_data, diretorio)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'feed_kb': round(len(ics_data) / 1024),
+        'resultado': resultado,
+        'tempos_ms': {nome: round(tempos[nome], 1) for nome in ETAPAS},
+        'total_ms': round(sum(tempos.values()), 1),
+        'pico_mb': round(pico / 1024 / 1024, 1),
+    }
+
+
+def comparar(escala, atual, base, tolerancia):
+    """Lista de problemas frente à linha de base (vazia se está tudo certo)"""
+    problemas = []
+    for campo, valor in base['resultado'].items():
+        if atual['resultado'].get(campo) != valor:
+            problemas.append(f"{escala}: {campo} mudou ({valor} -> {atual['resultado'].get(campo)})")
+    if atual['total_ms'] > base['total_ms'] * tolerancia:
+        problemas.append(f"{escala}: tempo total {atual['total_ms']:.0f}ms > {tolerancia}x a base "
+                         f"({base['total_ms']:.0f}ms)")
+    return problemas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline com feeds sintéticos")
+    parser.add_argument('--escalas', type=int, nargs='+', default=ESCALAS_PADRAO,
+                        help="Quantidades de eventos/séries gerados")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--tolerancia', type=float, default=1.5,
+                        help="Fator máximo do tempo total frente à linha de base")
+    parser.add_argument('--gravar', action='store_true', help="Grava os resultados como nova linha de base")
+    args = parser.parse_args(argv)
+
+    base = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+
+    print(f"{'escala':>7} {'feed':>8} {'ocorr.':>7} " + " ".join(f"{nome:>10}" for nome in ETAPAS)
+          + f" {'total':>9} {'pico':>8} {'base':>9}")
+    resultados = {}
+    problemas = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        executar(gerar_feed(20), diretorio)  # Aquecimento: icalendar/numpy são importados no primeiro uso
+        for escala in args.escalas:
+            atual = resultados[str(escala)] = medir(escala, args.repeticoes, diretorio)
+            anterior = base.get(str(escala))
+            print(f"{escala:>7} {atual['feed_kb']:>6}KB {atual['resultado']['ocorrencias']:>7} "
+                  + " ".join(f"{atual['tempos_ms'][nome]:>8.1f}ms" for nome in ETAPAS)
+                  + f" {atual['total_ms']:>7.1f}ms {atual['pico_mb']:>6.1f}MB "
+                  + (f"{anterior['total_ms']:>7.1f}ms" if anterior else f"{'-':>9}"))
+            if anterior and not args.gravar:
+                problemas += comparar(escala, atual, anterior, args.tolerancia)
+
+    if args.gravar:
+        base.update(resultados)
+        with open(BASELINE, 'w', encoding='utf-8') as f:
+            json.dump(base, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Linha de base gravada em {BASELINE}")
+        return 0
+
+    for problema in problemas:
+        print(f"REGRESSÃO: {problema}")
+    return 1 if problemas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
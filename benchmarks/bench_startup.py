@@ -0,0 +1,71 @@
+"""Benchmark: custo de importação na abertura do app, por módulo.
+
+Roda `python -X importtime -c "import <modulo>"` num processo novo (cache de
+imports frio) e lista os pacotes de primeiro nível mais caros, com o tempo
+acumulado de cada um. Mede também os módulos pesados que devem ficar fora da
+abertura (carregados só no primeiro uso).
+
+Uso: python benchmarks/bench_startup.py [modulo] [repeticoes]
+"""
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Devem ser importados só no primeiro download/parse/exportação
+PESADOS = ('requests', 'icalendar', 'dateutil', 'numpy', 'openpyxl')
+
+
+def medir_imports(modulo):
+    """(total, {import direto: us acumulados}, pacotes carregados) de uma importação a frio"""
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    # O -X importtime lista os filhos antes do pai; a indentação dá o nível
+    subarvore = []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith('import time:') or linha.count('|') != 2:
+            continue
+        _, acumulado, nome = linha[len('import time:'):].split('|')
+        if not acumulado.strip().isdigit():
+            continue  # Cabeçalho
+        nivel = (len(nome) - len(nome.lstrip()) - 1) // 2
+        nome = nome.strip()
+        if nivel == 0:
+            if nome == modulo:
+                diretos = {n: us for niv, n, us in subarvore if niv == 1}
+                pacotes = {n.split('.')[0] for _, n, _ in subarvore}
+                return int(acumulado), diretos, pacotes
+            subarvore = []  # Outro import de primeiro nível (ex: site)
+        else:
+            subarvore.append((nivel, nome, int(acumulado)))
+    raise RuntimeError(f"{modulo} não encontrado na saída do -X importtime")
+
+
+def main():
+    modulo = sys.argv[1] if len(sys.argv) > 1 else 'app'
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    # Mediana entre as repetições
+    execucoes = [medir_imports(modulo) for _ in range(repeticoes)]
+    total = sorted(e[0] for e in execucoes)[repeticoes // 2]
+    nomes = set().union(*(e[1] for e in execucoes))
+    medianas = {n: sorted(e[1].get(n, 0) for e in execucoes)[repeticoes // 2] for n in nomes}
+    pacotes = set().union(*(e[2] for e in execucoes))
+
+    print(f"import {modulo}: {total / 1000:.1f} ms (mediana de {repeticoes})")
+    print(f"{'import direto':<28}{'ms':>10}")
+    for nome, us in sorted(medianas.items(), key=lambda x: -x[1])[:20]:
+        print(f"{nome:<28}{us / 1000:>10.1f}")
+
+    carregados = [p for p in PESADOS if p in pacotes]
+    if carregados:
+        print(f"\nAVISO: importados na abertura: {', '.join(carregados)}")
+    else:
+        print(f"\nNenhum módulo pesado na abertura ({', '.join(PESADOS)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Gerador de feeds .ics sintéticos no estilo do Outlook, determinístico pela semente.
+
+Mistura eventos únicos, séries RRULE com UNTIL e COUNT, séries com listas
+grandes de EXDATE, substituições por RECURRENCE-ID (movidas e canceladas),
+eventos de dia inteiro e reuniões sobrepostas, com VTIMEZONE do Windows,
+VALARM e linhas dobradas em 75 octetos como no feed publicado.
+
+Uso: python benchmarks/gerar_ics.py n_eventos arquivo.ics [semente]
+"""
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+TZID = "E. South America Standard Time"
+INICIO_PADRAO = date(2025, 1, 6)  # Centro do intervalo coberto pelos eventos
+
+_VTIMEZONE = [
+    "BEGIN:VTIMEZONE", f"TZID:{TZID}",
+    "BEGIN:STANDARD", "DTSTART:16010101T000000", "TZOFFSETFROM:-0300", "TZOFFSETTO:-0300", "END:STANDARD",
+    "END:VTIMEZONE",
+]
+_DIAS_SEMANA = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+_ASSUNTOS = ("Daily", "Refinamento", "Planning", "Review", "1:1", "Alinhamento técnico", "Entrevista",
+             "Sync com produto", "Pareamento", "Retrospectiva", "Treinamento", "Cancelado: Demo")
+
+
+def _dobrar(linha):
+    """Dobra a linha em 75 octetos (RFC 5545), sem cortar caracteres UTF-8 ao meio"""
+    dados = linha.encode('utf-8')
+    partes = []
+    limite = 75
+    while len(dados) > limite:
+        corte = limite
+        while corte > 0 and (dados[corte] & 0xC0) == 0x80:
+            corte -= 1
+        partes.append(dados[:corte])
+        dados = dados[corte:]
+        limite = 74  # As continuações começam com um espaço
+    partes.append(dados)
+    return b'\r\n '.join(partes)
+
+
+class _Gerador:
+    def __init__(self, semente, inicio, dias_historico):
+        self.rnd = random.Random(semente)
+        self.inicio = datetime.combine(inicio, datetime.min.time())
+        self.dias_historico = dias_historico
+        self.uids = 0
+        self.linhas = []
+
+    def uid(self):
+        self.uids += 1
+        return f"040000008200E00074C5B7101A82E008{self.uids:032X}"
+
+    def horario(self, dia):
+        """Início num dia útil, em horário comercial de meia em meia hora (gera sobreposições)"""
+        dia = self.inicio + timedelta(days=dia)
+        while dia.weekday() >= 5:
+            dia += timedelta(days=1)
+        return dia + timedelta(hours=8, minutes=30 * self.rnd.randint(0, 18))
+
+    def formato(self, local):
+        """Formata instantes no TZID (maioria, como o Outlook) ou em UTC"""
+        if local:
+            return lambda dt: f";TZID={TZID}:{dt.strftime('%Y%m%dT%H%M%S')}"
+        return lambda dt: ":" + (dt + timedelta(hours=3)).strftime('%Y%m%dT%H%M%SZ')
+
+    def vevent(self, uid, inicio, fim, assunto, fmt, extras=(), dia_inteiro=False):
+        self.linhas += ["BEGIN:VEVENT", f"UID:{uid}", f"SUMMARY:{assunto}"]
+        if dia_inteiro:
+            self.linhas += [f"DTSTART;VALUE=DATE:{inicio:%Y%m%d}", f"DTEND;VALUE=DATE:{fim:%Y%m%d}"]
+        else:
+            self.linhas += ["DTSTART" + fmt(inicio), "DTEND" + fmt(fim)]
+        self.linhas += list(extras)
+        self.linhas += [
+            "DTSTAMP:20250101T120000Z", "SEQUENCE:0", "X-MICROSOFT-CDO-BUSYSTATUS:BUSY",
+            "BEGIN:VALARM", "TRIGGER:-PT15M", "ACTION:DISPLAY", "DESCRIPTION:Reminder", "END:VALARM",
+            "END:VEVENT",
+        ]
+
+    def assunto(self, i):
+        return f"{self.rnd.choice(_ASSUNTOS)} #{i} - sala {self.rnd.randint(1, 30)} / time de plataforma"
+
+    def unico(self, i):
+        inicio = self.horario(self.rnd.randint(-self.dias_historico, 180))
+        fim = inicio + timedelta(minutes=self.rnd.choice((15, 30, 45, 60, 90, 120)))
+        fmt = self.formato(self.rnd.random() < 0.7)
+        self.vevent(self.uid(), inicio, fim, self.assunto(i), fmt)
+        if self.rnd.random() < 0.3:  # Reunião sobreposta à anterior
+            deslocamento = timedelta(minutes=self.rnd.choice((0, 15, 30)))
+            self.vevent(self.uid(), inicio + deslocamento, fim + deslocamento + timedelta(minutes=30),
+                        self.assunto(i), fmt)
+
+    def dia_inteiro(self, i):
+        dia = (self.inicio + timedelta(days=self.rnd.randint(-self.dias_historico, 180))).date()
+        self.vevent(self.uid(), dia, dia + timedelta(days=self.rnd.choice((1, 1, 1, 2, 5))),
+                    f"Férias/feriado #{i}", None, dia_inteiro=True)
+
+    def serie(self, i, exdates_pesados=False):
+        rnd = self.rnd
+        inicio = self.horario(rnd.randint(-self.dias_historico, 60))
+        fim = inicio + timedelta(minutes=rnd.choice((15, 30, 60)))
+        fmt = self.formato(rnd.random() < 0.8)
+        if exdates_pesados or rnd.random() < 0.3:
+            passo, regra = timedelta(days=1), "FREQ=DAILY"
+        else:
+            passo, regra = timedelta(days=7), f"FREQ=WEEKLY;BYDAY={_DIAS_SEMANA[inicio.weekday()]}"
+        if rnd.random() < 0.6 or exdates_pesados:
+            n = rnd.randint(60, 500) if exdates_pesados else rnd.randint(8, 120)
+            regra += ";UNTIL=" + (inicio + passo * (n - 1) + timedelta(hours=3)).strftime('%Y%m%dT%H%M%SZ')
+        else:
+            n = rnd.randint(2, 60)
+            regra += f";COUNT={n}"
+
+        # Exceções só em ocorrências reais da série (inicio + k * passo)
+        n_exdates = rnd.randint(n // 4, n // 2) if exdates_pesados else rnd.randint(0, min(5, n - 1))
+        excluidas = sorted(rnd.sample(range(1, n), n_exdates)) if n > 1 else []
+        extras = [f"RRULE:{regra}"]
+        if excluidas:
+            extras.append("EXDATE" + fmt(inicio + passo * excluidas[0])
+                          + "".join("," + fmt(inicio + passo * k).split(':', 1)[1] for k in excluidas[1:]))
+        uid = self.uid()
+        assunto = self.assunto(i)
+        self.vevent(uid, inicio, fim, assunto, fmt, extras)
+
+        # Substituições: ocorrência movida uma hora ou cancelada
+        livres = [k for k in range(n) if k not in set(excluidas)]
+        for k in rnd.sample(livres, min(len(livres), rnd.choice((0, 0, 1, 2, 3)))):
+            original = inicio + passo * k
+            recurrence_id = "RECURRENCE-ID" + fmt(original)
+            if rnd.random() < 0.25:
+                self.vevent(uid, original, original + (fim - inicio), assunto, fmt,
+                            [recurrence_id, "STATUS:CANCELLED"])
+            else:
+                movido = original + timedelta(hours=1)
+                self.vevent(uid, movido, movido + (fim - inicio), assunto + " (remarcada)", fmt, [recurrence_id])
+
+
+def gerar_feed(n_eventos, semente=0, inicio=INICIO_PADRAO, dias_historico=None):
+    """Bytes de um VCALENDAR com `n_eventos` eventos/séries (mais sobreposições e substituições)
+
+    Os eventos se espalham por `dias_historico` antes de `inicio` (padrão:
+    cresce com o feed, como um calendário de anos) e seis meses depois, para
+    a densidade de reuniões por dia não explodir nas escalas maiores.
+    """
+    if dias_historico is None:
+        dias_historico = max(365, n_eventos // 2)
+    gerador = _Gerador(semente, inicio, dias_historico)
+    for i in range(n_eventos):
+        sorteio = gerador.rnd.random()
+        if sorteio < 0.50:
+            gerador.unico(i)
+        elif sorteio < 0.58:
+            gerador.dia_inteiro(i)
+        elif sorteio < 0.95:
+            gerador.serie(i)
+        else:
+            gerador.serie(i, exdates_pesados=True)
+
+    linhas = ["BEGIN:VCALENDAR", "METHOD:PUBLISH", "PRODID:Microsoft Exchange Server 2010", "VERSION:2.0",
+              "X-WR-CALNAME:Calendário"] + _VTIMEZONE + gerador.linhas + ["END:VCALENDAR"]
+    return b'\r\n'.join(_dobrar(linha) for linha in linhas) + b'\r\n'
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__.strip().splitlines()[-1])
+        return 1
+    semente = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    with open(sys.argv[2], 'wb') as f:
+        f.write(gerar_feed(int(sys.argv[1]), semente))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""Cache em disco das ocorrências expandidas, chaveado pelo conteúdo do feed."""
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+from pytz import UTC
+
+from ics_stream import LIBERAR_A_CADA, liberar_paginas
+
+# Cabeçalho: magic, versão, cobertura (epoch do início e do fim), nº de ocorrências, nº de textos
+_CABECALHO = struct.Struct('<4sIqqII')
+_MAGIC = b'OCC1'
+_VERSAO = 2  # 2: chave de evento único passou a ser só o UID
+
+
+def hash_feed(ics_data):
+    """sha256 do feed (bytes ou mmap), lido em blocos para não manter o mmap inteiro residente"""
+    h = hashlib.sha256()
+    with memoryview(ics_data) as dados:
+        for pos in range(0, len(dados), LIBERAR_A_CADA):
+            h.update(dados[pos:pos + LIBERAR_A_CADA])
+            liberar_paginas(ics_data, pos, pos + LIBERAR_A_CADA)
+    return h.hexdigest()
+
+
+def _epoch_inicio(data):
+    return int(UTC.localize(datetime.combine(data, datetime.min.time())).timestamp())
+
+
+def _epoch_fim(data):
+    """Último segundo do dia (mesmo limite de processar_calendario)"""
+    return _epoch_inicio(data + timedelta(days=1)) - 1
+
+
+class OcorrenciasFeed:
+    """Ocorrências de um feed em arrays ordenados por (início, fim)
+
+    Descrições e chaves ficam numa tabela de textos única (cada texto
+    aparece uma vez); as ocorrências guardam só os índices.
+    """
+    __slots__ = ('cobertura', 'inicios', 'fins', 'i_descricao', 'i_chave', 'textos')
+
+    def __init__(self, cobertura, inicios, fins, i_descricao, i_chave, textos):
+        self.cobertura = cobertura  # (epoch_inicio, epoch_fim) coberto pela expansão
+        self.inicios = inicios
+        self.fins = fins
+        self.i_descricao = i_descricao
+        self.i_chave = i_chave
+        self.textos = textos
+
+    @classmethod
+    def de_eventos(cls, eventos, cobertura):
+        eventos = sorted(eventos, key=lambda x: (x[0], x[1]))
+        indices = {}
+        textos = []
+
+        def indice(texto):
+            i = indices.get(texto)
+            if i is None:
+                i = indices[texto] = len(textos)
+                textos.append(texto)
+            return i
+
+        return cls(
+            cobertura,
+            array('q', (int(e[0].timestamp()) for e in eventos)),
+            array('q', (int(e[1].timestamp()) for e in eventos)),
+            array('i', (indice(e[2]) for e in eventos)),
+            array('i', (indice(e[3]) for e in eventos)),
+            textos,
+        )
+
+    def cobre(self, data_inicio, data_fim):
+        return self.cobertura[0] <= _epoch_inicio(data_inicio) and _epoch_fim(data_fim) <= self.cobertura[1]
+
+    def fatia(self, data_inicio, data_fim):
+        """(inicio, fim, descricao, chave) com início no período, como processar_calendario"""
+        a = bisect_left(self.inicios, _epoch_inicio(data_inicio))
+        b = bisect_right(self.inicios, _epoch_fim(data_fim))
+        textos = self.textos
+        return [
+            (datetime.fromtimestamp(self.inicios[i], UTC), datetime.fromtimestamp(self.fins[i], UTC),
+             textos[self.i_descricao[i]], textos[self.i_chave[i]])
+            for i in range(a, b)
+        ]
+
+    def para_bytes(self):
+        blob = [t.encode('utf-8') for t in self.textos]
+        partes = [
+            _CABECALHO.pack(_MAGIC, _VERSAO, self.cobertura[0], self.cobertura[1], len(self.inicios), len(blob)),
+            self.inicios.tobytes(), self.fins.tobytes(), self.i_descricao.tobytes(), self.i_chave.tobytes(),
+            array('I', (len(b) for b in blob)).tobytes(),
+        ]
+        partes.extend(blob)
+        return b''.join(partes)
+
+    @classmethod
+    def de_bytes(cls, dados):
+        magic, versao, cob_ini, cob_fim, n, n_textos = _CABECALHO.unpack_from(dados)
+        if magic != _MAGIC or versao != _VERSAO:
+            raise ValueError("formato de cache desconhecido")
+        pos = _CABECALHO.size
+
+        def ler_array(tipo, quantidade):
+            nonlocal pos
+            arr = array(tipo)
+            tamanho = arr.itemsize * quantidade
+            arr.frombytes(dados[pos:pos + tamanho])
+            pos += tamanho
+            return arr
+
+        inicios = ler_array('q', n)
+        fins = ler_array('q', n)
+        i_descricao = ler_array('i', n)
+        i_chave = ler_array('i', n)
+        textos = []
+        for tamanho in ler_array('I', n_textos):
+            textos.append(dados[pos:pos + tamanho].decode('utf-8'))
+            pos += tamanho
+        return cls((cob_ini, cob_fim), inicios, fins, i_descricao, i_chave, textos)
+
+
+class CacheOcorrencias:
+    """Ocorrências expandidas (antes do merge de conflitos) por hash do feed
+
+    Cada feed é expandido uma vez sobre `horizonte_dias` antes e depois do
+    período pedido; trocar a data da sprint dentro dessa cobertura vira um
+    bisect no array ordenado. O diretório é limitado a `limite_mb`: os
+    arquivos menos usados recentemente são apagados primeiro.
+    """
+
+    def __init__(self, diretorio="occurrence_cache", horizonte_dias=180, limite_mb=64):
+        self.diretorio = diretorio
+        self.horizonte_dias = horizonte_dias
+        self.limite_bytes = int(limite_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._memoria = (None, None)  # (hash, OcorrenciasFeed) do último feed usado
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, chave + '.occ')
+
+    def cobertura(self, data_inicio, data_fim):
+        """Período a expandir num miss"""
+        margem = timedelta(days=self.horizonte_dias)
+        return data_inicio - margem, data_fim + margem
+
+    def obter(self, chave, data_inicio, data_fim):
+        """Ocorrências do período, ou None se o feed não está em cache ou a cobertura não basta"""
+        with self._lock:
+            feed = self._memoria[1] if self._memoria[0] == chave else self._ler(chave)
+            if feed is None or not feed.cobre(data_inicio, data_fim):
+                return None
+            self._memoria = (chave, feed)
+        return feed.fatia(data_inicio, data_fim)
+
+    def _ler(self, chave):
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, 'rb') as f:
+                feed = OcorrenciasFeed.de_bytes(f.read())
+            os.utime(caminho)  # Marca como usado recentemente (ordem de remoção)
+            return feed
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Erro ao ler cache de ocorrências: {e}")
+            return None
+
+    def gravar(self, chave, eventos, cobertura):
+        """Guarda as ocorrências de `cobertura` ((data_inicio, data_fim)) e aplica o limite de tamanho"""
+        feed = OcorrenciasFeed.de_eventos(
+            eventos, (_epoch_inicio(cobertura[0]), _epoch_fim(cobertura[1])))
+        with self._lock:
+            self._memoria = (chave, feed)
+            try:
+                os.makedirs(self.diretorio, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(prefix='.tmp_', suffix='.occ', dir=self.diretorio)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(feed.para_bytes())
+                os.replace(tmp, self._caminho(chave))
+                self._aplicar_limite()
+            except Exception as e:
+                print(f"Erro ao gravar cache de ocorrências: {e}")
+        return feed
+
+    def _aplicar_limite(self):
+        """Remove os feeds menos usados até o diretório caber em limite_bytes"""
+        arquivos = []
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith('.occ') and not nome.startswith('.tmp_'):
+                caminho = os.path.join(self.diretorio, nome)
+                st = os.stat(caminho)
+                arquivos.append((st.st_mtime, st.st_size, caminho))
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= self.limite_bytes:
+                break
+            if caminho == self._caminho(self._memoria[0]):
+                continue  # Nunca remove o feed em uso
+            os.remove(caminho)
+            total -= tamanho
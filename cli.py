@@ -0,0 +1,153 @@
+"""Modo em lote (sem interface) para cron e CI.
+
+Roda o mesmo processamento de "Carregar dar Url" + "Exportar CSV" sem
+importar tkinter ou tkcalendar:
+
+    python cli.py --url outlook.office365.com/.../calendar.ics --start 2025-06-02 --out xlsx
+    python cli.py --ics calendario.ics --start 2025-06-02 --end 2025-06-13 --out json --arquivo sprint.json
+
+Minutos excedentes, eventos locais e entregas são lidos (sem alteração) dos
+arquivos do app no diretório --dados; o sprint_tracker.db é aberto somente
+leitura e a importação de JSON legado pendente fica só em memória.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+import exportacao
+import sprint_engine as engine
+from armazenamento import EntregasStore, LocalEventStore
+from excedentes import ExcedentesStore
+from cache_ocorrencias import CacheOcorrencias
+from feed_cache import FeedCache
+from fuso import ConversorFuso
+from modelo_eventos import ModeloEventos
+from perfil import PERFIL
+
+ESCRITORES = {
+    'csv': exportacao.escrever_csv,
+    'xlsx': exportacao.escrever_xlsx,
+    'json': exportacao.escrever_json,
+}
+
+
+def _data(texto):
+    try:
+        return datetime.strptime(texto, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida (use AAAA-MM-DD): {texto}")
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Calcula as horas da sprint a partir do calendário (sem interface)")
+    fonte = parser.add_mutually_exclusive_group(required=True)
+    fonte.add_argument('--url', help="URL do calendário (.ics)")
+    fonte.add_argument('--ics', help="Arquivo .ics local")
+    parser.add_argument('--start', type=_data, required=True, help="Início da sprint (AAAA-MM-DD)")
+    parser.add_argument('--end', type=_data, help="Fim da sprint (padrão: duas semanas a partir do início)")
+    parser.add_argument('--out', choices=sorted(ESCRITORES), default='csv', help="Formato de saída")
+    parser.add_argument('--arquivo', help="Arquivo de saída (padrão: sprint_<início>.<formato>)")
+    parser.add_argument('--politica', choices=sorted(engine.POLITICAS_CONFLITO), default=engine.POLITICA_PADRAO,
+                        help="Política de conflitos entre eventos sobrepostos")
+    parser.add_argument('--tz', default=engine.TZ_PADRAO, help="Fuso horário dos relatórios (ex: America/Sao_Paulo)")
+    parser.add_argument('--dados', default='.',
+                        help="Diretório com excess_minutes.json, sprint_tracker.db e sprint_tasks.json")
+    parser.add_argument('--cache', default='feed_cache', help="Diretório do cache do feed e das ocorrências ('' desativa)")
+    parser.add_argument('--timeout', type=int, default=10, help="Timeout do download em segundos")
+    parser.add_argument('--limite-mb', type=float, default=engine.LIMITE_FEED_MB,
+                        help="Tamanho máximo do feed baixado, em MB (0 desativa)")
+    parser.add_argument('--perfil', action='store_true', help="Mostra tempos por etapa e contadores no stderr")
+    parser.add_argument('--trace', help="Grava o trace JSON das etapas (chrome://tracing / Perfetto)")
+    parser.add_argument('--cprofile', help="Grava o cProfile do carregamento (.prof)")
+    parser.add_argument('--debug', action='store_true', help="Mensagens de diagnóstico por evento exportado")
+    return parser
+
+
+def montar_modelo(eventos_calendario, data_inicio, data_fim, dados, fuso):
+    """Mesmo conteúdo da lista do app: eventos do calendário + locais do período"""
+    modelo = ModeloEventos(fuso)
+    # Somente leitura: horizonte 0 não move nada para o arquivo morto
+    excedentes = ExcedentesStore(os.path.join(dados, "excess_minutes.json"),
+                                 os.path.join(dados, "excess_minutes_archive.json"), horizonte_dias=0)
+    excedentes.carregar()
+    for inicio, fim, descricao, chave in eventos_calendario:
+        inicio_local = fuso.local(inicio)
+        excess_min = excedentes.obter(chave, engine.chave_excedente(inicio_local, descricao))
+        modelo.adicionar(inicio, fim, descricao, False, excess_min, chave=chave, inicio_local=inicio_local)
+
+    caminho_db = os.path.join(dados, "sprint_tracker.db")
+    json_legado = os.path.join(dados, "local_events.json")
+    if os.path.exists(caminho_db) or os.path.exists(json_legado):
+        store = LocalEventStore(caminho_db, json_legado, somente_leitura=True)
+        try:
+            for event in store.no_periodo(data_inicio, data_fim):
+                modelo.adicionar(event['start'], event['end'], event['description'], True,
+                                 event.get('excess_minutes', 0), local_event=event)
+        finally:
+            store.fechar()
+    return modelo
+
+
+def ler_entregas(data_inicio, data_fim, dados):
+    """(data_str, tarefa) das entregas do período"""
+    caminho_db = os.path.join(dados, "sprint_tracker.db")
+    json_legado = os.path.join(dados, "sprint_tasks.json")
+    if not (os.path.exists(caminho_db) or os.path.exists(json_legado)):
+        return []
+    store = EntregasStore(caminho_db, json_legado, somente_leitura=True)
+    try:
+        return [(data_str, tarefa) for _, data_str, tarefa in store.no_periodo(data_inicio, data_fim)]
+    finally:
+        store.fechar()
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    try:
+        fuso = ConversorFuso(args.tz)
+    except Exception as e:
+        print(f"Fuso horário inválido: {e}", file=sys.stderr)
+        return 1
+    data_inicio, data_fim = engine.periodo_sprint(args.start, args.end, duas_semanas=args.end is None)
+    PERFIL.debug_ativo = args.debug
+    PERFIL.trace_ativo = bool(args.trace)
+
+    try:
+        if args.url:
+            cache = FeedCache(args.cache) if args.cache else None
+            fonte = engine.abrir_url(args.url, timeout=args.timeout, cache=cache, limite_mb=args.limite_mb)
+        else:
+            fonte = engine.abrir_ics(args.ics)
+        with PERFIL.cprofile(args.cprofile), fonte as ics_data:
+            cache_ocorrencias = CacheOcorrencias(os.path.join(args.cache, "ocorrencias")) if args.cache else None
+            eventos = engine.carregar_eventos_calendario(ics_data, data_inicio, data_fim, politica=args.politica,
+                                                         cache_ocorrencias=cache_ocorrencias)
+    except Exception as e:
+        print(f"Falha ao carregar calendário: {e}", file=sys.stderr)
+        return 1
+
+    modelo = montar_modelo(eventos, data_inicio, data_fim, args.dados, fuso)
+    entregas = ler_entregas(data_inicio, data_fim, args.dados)
+    caminho = args.arquivo or f"sprint_{data_inicio.isoformat()}.{args.out}"
+    try:
+        with PERFIL.span("exportacao"):
+            ESCRITORES[args.out](caminho, modelo.selecionados(), entregas)
+    except Exception as e:
+        print(f"Falha ao exportar: {e}", file=sys.stderr)
+        return 1
+
+    with PERFIL.span("calcular_total"):
+        totais = modelo.totais.como_dict()
+        totais['total_sem_sobreposicao'] = modelo.minutos_sem_sobreposicao()
+    print(f"{data_inicio} a {data_fim}: {engine.texto_totais(totais)}")
+    print(f"Exportado para {caminho}")
+    if args.perfil:
+        print(PERFIL.resumo(), file=sys.stderr)
+    if args.trace:
+        PERFIL.gravar_trace(args.trace)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""Minutos excedentes com gravação em lote (write-behind) e arquivamento."""
+import json
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+
+FORMATO = 2
+
+
+def gravar_json_atomico(caminho, dados):
+    """Grava em arquivo temporário no mesmo diretório e substitui com os.replace"""
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    fd, tmp = tempfile.mkstemp(prefix='.tmp_', suffix='.json', dir=diretorio)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False)
+        os.replace(tmp, caminho)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _data_chave_legada(chave):
+    """Data de uma chave antiga '%Y%m%d%H%M_descricao'"""
+    try:
+        return datetime.strptime(chave[:8], '%Y%m%d').date()
+    except ValueError:
+        return None
+
+
+class ExcedentesStore:
+    """Minutos excedentes por ocorrência, chaveados por UID/RECURRENCE-ID
+
+    As alterações ficam em memória até `gravar()`, que a interface chama por
+    timer e ao fechar. Entradas mais antigas que `horizonte_dias` vão para o
+    arquivo morto, para o principal não crescer sem limite.
+    Chaves antigas ('%Y%m%d%H%M_descricao') são migradas na primeira leitura.
+    """
+
+    def __init__(self, arquivo="excess_minutes.json", arquivo_morto="excess_minutes_archive.json",
+                 horizonte_dias=180):
+        self.arquivo = arquivo
+        self.arquivo_morto = arquivo_morto
+        self.horizonte_dias = horizonte_dias
+        self.itens = {}    # chave -> [minutos, 'YYYY-MM-DD']
+        self.legado = {}   # chave antiga -> minutos, ainda não migradas
+        self.pendente = False
+        self._morto = None  # Arquivo morto, lido só quando uma sprint antiga é aberta
+
+    def carregar(self):
+        if not os.path.exists(self.arquivo):
+            return
+        try:
+            with open(self.arquivo, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        except Exception as e:
+            print(f"Erro ao carregar minutos excedentes: {e}")
+            return
+
+        if isinstance(dados, dict) and dados.get('formato') == FORMATO:
+            self.itens = dados.get('itens', {})
+            self.legado = dados.get('legado', {})
+        else:
+            # Formato antigo: {chave_antiga: minutos}
+            self.legado = dados
+            self.pendente = True
+        self.arquivar()
+
+    def obter(self, chave, chave_legada=None):
+        item = self.itens.get(chave)
+        if item is not None:
+            return item[0]
+        if chave_legada is not None and chave_legada in self.legado:
+            minutos = self.legado.pop(chave_legada)
+            data = _data_chave_legada(chave_legada) or date.today()
+            self.definir(chave, minutos, data)
+            return minutos
+        return self._obter_arquivado(chave, chave_legada)
+
+    def _ler_morto(self):
+        if self._morto is None:
+            self._morto = {'formato': FORMATO, 'itens': {}, 'legado': {}}
+            if os.path.exists(self.arquivo_morto):
+                try:
+                    with open(self.arquivo_morto, 'r', encoding='utf-8') as f:
+                        self._morto = json.load(f)
+                except Exception as e:
+                    print(f"Erro ao ler arquivo morto de excedentes: {e}")
+                    return None
+        return self._morto
+
+    def _obter_arquivado(self, chave, chave_legada):
+        """Consulta (sem restaurar) o valor de uma entrada já arquivada"""
+        if not os.path.exists(self.arquivo_morto):
+            return 0
+        morto = self._ler_morto()
+        if morto is None:
+            return 0
+        item = morto.get('itens', {}).get(chave)
+        if item is not None:
+            return item[0]
+        return morto.get('legado', {}).get(chave_legada, 0)
+
+    def definir(self, chave, minutos, data, chave_legada=None):
+        # Zero só precisa ser gravado se houver valor arquivado (na chave nova ou na antiga) a sobrescrever
+        if minutos or self._obter_arquivado(chave, chave_legada):
+            self.itens[chave] = [minutos, data.isoformat()]
+        else:
+            self.itens.pop(chave, None)
+        self.pendente = True
+
+    def arquivar(self, hoje=None):
+        """Move para o arquivo morto as entradas anteriores ao horizonte"""
+        if not self.horizonte_dias:
+            return 0
+        limite = ((hoje or date.today()) - timedelta(days=self.horizonte_dias)).isoformat()
+
+        antigos = {k: v for k, v in self.itens.items() if v[1] < limite}
+        antigos_legado = {}
+        for chave, minutos in self.legado.items():
+            data = _data_chave_legada(chave)
+            if data is not None and data.isoformat() < limite:
+                antigos_legado[chave] = minutos
+        if not antigos and not antigos_legado:
+            return 0
+
+        morto = self._ler_morto()
+        if morto is None:
+            return 0
+        morto.setdefault('itens', {}).update(antigos)
+        morto.setdefault('legado', {}).update(antigos_legado)
+        try:
+            gravar_json_atomico(self.arquivo_morto, morto)
+        except Exception as e:
+            print(f"Erro ao arquivar minutos excedentes: {e}")
+            return 0
+
+        for chave in antigos:
+            del self.itens[chave]
+        for chave in antigos_legado:
+            del self.legado[chave]
+        self.pendente = True
+        return len(antigos) + len(antigos_legado)
+
+    def gravar(self):
+        """Grava as alterações pendentes (substituição atômica do arquivo)"""
+        if not self.pendente:
+            return
+        dados = {'formato': FORMATO, 'itens': self.itens}
+        if self.legado:
+            dados['legado'] = self.legado
+        try:
+            gravar_json_atomico(self.arquivo, dados)
+            self.pendente = False
+        except Exception as e:
+            print(f"Erro ao salvar minutos excedentes: {e}")
@@ -0,0 +1,214 @@
+"""Exportadores dos eventos e entregas da sprint, sem dependência de interface."""
+import csv
+import json
+from datetime import date
+
+import agregacao
+from perfil import PERFIL
+from sprint_engine import formatar_duracao
+
+CABECALHO_EVENTOS = [
+    "Data",
+    "Hora Início",
+    "Hora Fim",
+    "Duração (minutos)",
+    "Excedidos",
+    "Duração Total",
+    "Descrição",
+    "Tipo (Local/Calendário)"
+]
+
+CABECALHO_TOTAIS_DIA = ["Data", "Minutos", "Excedidos", "Total", "Total (h)"]
+
+# Larguras das colunas na planilha (em caracteres)
+LARGURAS_EVENTOS = [12, 11, 10, 17, 10, 14, 50, 22]
+LARGURAS_TOTAIS_DIA = [12, 10, 10, 10, 10]
+
+
+def registros_eventos(eventos):
+    """Gera (data, hora_inicio, hora_fim, duracao, excedidos, total, descricao, tipo) em ordem de início local
+
+    `eventos` é qualquer iterável de objetos com inicio_local, fim_local,
+    descricao, excess_minutes e is_local (ex: EventoSprint), já convertidos
+    para o fuso local. Valores tipados; cada exportador formata do seu jeito.
+    """
+    for evento in sorted(eventos, key=lambda e: e.inicio_local):
+        inicio_naive, fim_naive = evento.inicio_local, evento.fim_local
+        if PERFIL.debug_ativo:
+            PERFIL.debug(f"{evento.descricao} - inicio: {evento.inicio} ({evento.inicio.tzinfo}), "
+                         f"fim: {evento.fim} ({evento.fim.tzinfo})")
+        duracao = int((fim_naive - inicio_naive).total_seconds() / 60)
+
+        yield (
+            inicio_naive.date(),
+            inicio_naive.strftime('%H:%M'),
+            fim_naive.strftime('%H:%M'),
+            duracao,
+            evento.excess_minutes,
+            duracao + evento.excess_minutes,
+            evento.descricao,
+            "Local" if evento.is_local else "Calendário"
+        )
+
+
+def linhas_eventos(eventos):
+    """Linhas de texto da tabela de eventos (CSV/JSON)"""
+    for registro in registros_eventos(eventos):
+        yield [registro[0].isoformat()] + [str(valor) for valor in registro[1:]]
+
+
+def registros_totais_dia(eventos):
+    """(data, minutos, excedidos, total, total formatado) por dia; eventos que passam da meia-noite são divididos
+
+    `eventos` precisa ter inicio_local, fim_local e excess_minutes (ex: EventoSprint).
+    """
+    resumo = agregacao.agregar_eventos(eventos)
+    for dia, minutos, excedentes in resumo['por_dia']:
+        yield (dia, minutos, excedentes, minutos + excedentes, formatar_duracao(minutos + excedentes))
+
+
+def linhas_totais_dia(eventos):
+    for registro in registros_totais_dia(eventos):
+        yield [registro[0].isoformat()] + [str(valor) for valor in registro[1:]]
+
+
+def escrever_csv(caminho, eventos, entregas):
+    """Escreve eventos, entregas ((data_str, tarefa)) e totais por dia no CSV separado por ';'"""
+    eventos = list(eventos)
+    with open(caminho, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile, delimiter=';')
+
+        # --------- Parte 1: Eventos ---------
+        writer.writerow(CABECALHO_EVENTOS)
+        writer.writerows(linhas_eventos(eventos))
+
+        # --------- Linha em branco + cabeçalho de tarefas ---------
+        writer.writerow([])
+        writer.writerow(["Entregas da Sprint"])
+        writer.writerow(["Data", "Tarefa"])
+        for data_str, tarefa in entregas:
+            writer.writerow([data_str, tarefa])
+
+        # --------- Totais por dia ---------
+        writer.writerow([])
+        writer.writerow(["Totais por Dia"])
+        writer.writerow(CABECALHO_TOTAIS_DIA)
+        writer.writerows(linhas_totais_dia(eventos))
+
+
+def escrever_json(caminho, eventos, entregas):
+    """Eventos, entregas e totais (por dia, semana e sprint) em JSON"""
+    eventos = list(eventos)
+    resumo = agregacao.agregar_eventos(eventos)
+    dados = {
+        'eventos': [dict(zip(CABECALHO_EVENTOS, linha)) for linha in linhas_eventos(eventos)],
+        'entregas': [{'data': data_str, 'tarefa': tarefa} for data_str, tarefa in entregas],
+        'totais': {chave: resumo[chave] for chave in
+                   ('total_minutos', 'total_excess', 'total_final', 'total_sem_sobreposicao', 'selecionados')},
+        'por_dia': [{'data': d.isoformat(), 'minutos': m, 'excedidos': x} for d, m, x in resumo['por_dia']],
+        'por_semana': [{'semana': d.isoformat(), 'minutos': m, 'excedidos': x} for d, m, x in resumo['por_semana']],
+    }
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+
+
+def _nova_aba(wb, titulo, cabecalho, larguras=None):
+    """Aba write-only: larguras e congelamento precisam vir antes da primeira linha"""
+    from openpyxl.utils import get_column_letter
+
+    aba = wb.create_sheet(titulo)
+    for i, largura in enumerate(larguras or [], start=1):
+        aba.column_dimensions[get_column_letter(i)].width = largura
+    aba.freeze_panes = 'A2'
+    aba.append(cabecalho)
+    return aba
+
+
+def _gravar_linhas(aba, linhas):
+    """Cada linha vai direto para o arquivo (modo write-only): memória constante"""
+    for linha in linhas:
+        aba.append(linha)
+
+
+def escrever_xlsx(caminho, eventos, entregas):
+    """Planilha com abas 'Eventos', 'Entregas' e 'Totais por Dia'
+
+    Usa o modo write-only (streaming) do openpyxl: as linhas saem dos
+    geradores direto para o arquivo, sem montar as células em memória.
+    """
+    from openpyxl import Workbook  # Só quem exporta XLSX precisa do openpyxl
+
+    eventos = list(eventos)
+    wb = Workbook(write_only=True)
+    aba = _nova_aba(wb, "Eventos", CABECALHO_EVENTOS, LARGURAS_EVENTOS)
+    aba.auto_filter.ref = "A1:H1"
+    _gravar_linhas(aba, registros_eventos(eventos))
+
+    aba = _nova_aba(wb, "Entregas", ["Data", "Tarefa"], [12, 60])
+    _gravar_linhas(aba, ([date.fromisoformat(data_str), tarefa] for data_str, tarefa in entregas))
+
+    aba = _nova_aba(wb, "Totais por Dia", CABECALHO_TOTAIS_DIA, LARGURAS_TOTAIS_DIA)
+    _gravar_linhas(aba, registros_totais_dia(eventos))
+    wb.save(caminho)
+
+
+CABECALHO_RELATORIO = [
+    "Sprint Início",
+    "Sprint Fim",
+    "Eventos",
+    "Minutos",
+    "Excedidos",
+    "Total",
+    "Sem Sobreposição",
+    "Total (h)",
+    "Entregas",
+]
+
+
+def registros_relatorio(resumo):
+    for sprint in resumo:
+        yield (
+            sprint['inicio'],
+            sprint['fim'],
+            sprint['selecionados'],
+            sprint['total_minutos'],
+            sprint['total_excess'],
+            sprint['total_final'],
+            sprint['total_sem_sobreposicao'],
+            formatar_duracao(sprint['total_final']),
+            len(sprint['entregas']),
+        )
+
+
+def registros_entregas_relatorio(resumo):
+    for sprint in resumo:
+        for data_str, tarefa in sprint['entregas']:
+            yield (sprint['inicio'], date.fromisoformat(data_str), tarefa)
+
+
+def escrever_relatorio_csv(caminho, resumo):
+    """Escreve o relatório multi-sprint (relatorio.resumir_sprints) no CSV separado por ';'"""
+    with open(caminho, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile, delimiter=';')
+        writer.writerow(CABECALHO_RELATORIO)
+        for registro in registros_relatorio(resumo):
+            writer.writerow([registro[0].isoformat(), registro[1].isoformat()] + [str(v) for v in registro[2:]])
+
+        # --------- Entregas por sprint ---------
+        writer.writerow([])
+        writer.writerow(["Entregas por Sprint"])
+        writer.writerow(["Sprint Início", "Data", "Tarefa"])
+        for inicio, data_entrega, tarefa in registros_entregas_relatorio(resumo):
+            writer.writerow([inicio.isoformat(), data_entrega.isoformat(), tarefa])
+
+
+def escrever_relatorio_xlsx(caminho, resumo):
+    """Relatório multi-sprint em planilha (abas 'Sprints' e 'Entregas'), em modo write-only"""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    aba = _nova_aba(wb, "Sprints", CABECALHO_RELATORIO, [13, 12, 9, 10, 10, 10, 17, 10, 9])
+    _gravar_linhas(aba, registros_relatorio(resumo))
+    aba = _nova_aba(wb, "Entregas", ["Sprint Início", "Data", "Tarefa"], [13, 12, 60])
+    _gravar_linhas(aba, registros_entregas_relatorio(resumo))
+    wb.save(caminho)
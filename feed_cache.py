@@ -0,0 +1,153 @@
+"""Cache em disco dos feeds .ics com requisições condicionais (ETag / Last-Modified)."""
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+from perfil import PERFIL
+
+TAMANHO_BLOCO = 64 * 1024
+
+
+def gravar_em_blocos(response, caminho, limite_bytes=None):
+    """Grava o corpo de uma resposta `stream=True` em `caminho`, bloco a bloco
+
+    O corpo nunca fica inteiro na memória. Passando de `limite_bytes`
+    (já descomprimido), o arquivo parcial é apagado e sobe ValueError.
+    """
+    try:
+        tamanho = response.headers.get('Content-Length', '')
+        if limite_bytes and tamanho.isdigit() and int(tamanho) > limite_bytes:
+            raise ValueError(_mensagem_limite(limite_bytes))
+        total = 0
+        with open(caminho, 'wb') as f:
+            for bloco in response.iter_content(chunk_size=TAMANHO_BLOCO):
+                total += len(bloco)
+                if limite_bytes and total > limite_bytes:
+                    raise ValueError(_mensagem_limite(limite_bytes))
+                f.write(bloco)
+        return total
+    except BaseException:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+        raise
+    finally:
+        response.close()
+
+
+def _mensagem_limite(limite_bytes):
+    return f"O calendário passa do limite de {limite_bytes / 1024 / 1024:.0f} MB"
+
+
+class FeedCache:
+    def __init__(self, diretorio="feed_cache", session=None):
+        self.diretorio = diretorio
+        self._session = session
+        self._lock_session = threading.Lock()
+
+    @property
+    def session(self):
+        """Criada no primeiro download, para o requests não pesar na abertura do app"""
+        with self._lock_session:
+            if self._session is None:
+                self._session = self._criar_session()
+            return self._session
+
+    @staticmethod
+    def _criar_session():
+        """Session com pool de conexões reaproveitado entre recargas"""
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+        return session
+
+    def _caminhos(self, url):
+        nome = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.diretorio, nome)
+        return base + '.ics', base + '.json'
+
+    def _ler_meta(self, meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def baixar_para_arquivo(self, url, timeout=10, limite_bytes=None):
+        """Baixa a URL em blocos para o cache e entrega o caminho do corpo
+
+        Quando o servidor responde 304, o corpo salvo é reaproveitado sem
+        nova transferência. `limite_bytes` segue gravar_em_blocos. Se o
+        corpo do cache não puder ser substituído, o download fica num
+        temporário apagado ao sair do bloco `with`.
+        """
+        corpo_path, meta_path = self._caminhos(url)
+        meta = self._ler_meta(meta_path) if os.path.exists(corpo_path) else {}
+
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        response = self.session.get(url, timeout=timeout, headers=headers, stream=True)
+        PERFIL.contar(f"feed_http_{response.status_code}")  # 304: corpo do cache reaproveitado
+
+        if response.status_code == 304:
+            response.close()
+            if os.path.exists(corpo_path):
+                yield corpo_path
+                return
+            # Corpo sumiu do disco: refazer sem condicionais
+            response = self.session.get(url, timeout=timeout, stream=True)
+            PERFIL.contar(f"feed_http_{response.status_code}")
+
+        if not response.ok:
+            response.close()
+            response.raise_for_status()
+
+        # Escrever em arquivo temporário e substituir para não deixar cache pela metade
+        os.makedirs(self.diretorio, exist_ok=True)
+        tmp = f"{corpo_path}.{threading.get_ident()}.tmp"
+        gravar_em_blocos(response, tmp, limite_bytes)
+        try:
+            os.replace(tmp, corpo_path)
+        except OSError:
+            # Corpo anterior ainda mapeado por outro carregamento (Windows): usa o temporário desta vez.
+            # O meta descreve um corpo que não é o do disco: sem ele, o próximo download é incondicional
+            self._remover(meta_path)
+            try:
+                yield tmp
+            finally:
+                self._remover(tmp)
+            return
+        self._salvar_meta(meta_path, url, response.headers)
+        yield corpo_path
+
+    @staticmethod
+    def _remover(caminho):
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+    def _salvar_meta(self, meta_path, url, headers):
+        meta = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+        }
+        try:
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        except OSError as e:
+            print(f"Erro ao salvar cache do feed: {e}")
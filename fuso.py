@@ -0,0 +1,64 @@
+"""Conversão UTC -> horário local por tabela de transições de offset."""
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from pytz import UTC, timezone
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _tabela_transicoes(tz):
+    """(instantes UTC em epoch, offsets em segundos) a partir das transições do pytz
+
+    Fusos sem tabela (UTC e offsets fixos) viram uma única entrada; outros
+    tipos de tzinfo retornam None e a conversão cai no astimezone.
+    """
+    transicoes = getattr(tz, '_utc_transition_times', None)
+    info = getattr(tz, '_transition_info', None)
+    if transicoes is not None and info is not None:
+        epochs = [int((t - _EPOCH).total_seconds()) if t.year > 1 else float('-inf') for t in transicoes]
+        return epochs, [int(i[0].total_seconds()) for i in info]
+    offset = tz.utcoffset(None)
+    if offset is not None:
+        return [float('-inf')], [int(offset.total_seconds())]
+    return None
+
+
+class ConversorFuso:
+    """Converte instantes para horário local (naive) de um fuso
+
+    O offset vem de um bisect na tabela de transições (horário de verão
+    etc.), calculada uma vez por fuso, em vez do astimezone do pytz. Quem
+    converte guarda o resultado (ex: EventoSprint.inicio_local), para cada
+    instante ser convertido uma única vez.
+    """
+
+    def __init__(self, tz):
+        self.tz = timezone(tz) if isinstance(tz, str) else tz
+        tabela = _tabela_transicoes(self.tz)
+        self.transicoes, self.offsets = tabela if tabela else (None, None)
+
+    def offset(self, epoch):
+        """Offset UTC (segundos) vigente no instante `epoch`"""
+        return self.offsets[max(bisect_right(self.transicoes, epoch) - 1, 0)]
+
+    def local(self, dt):
+        """datetime com timezone -> naive no fuso; naive é retornado como está"""
+        if dt.tzinfo is None:
+            return dt
+        if self.transicoes is None or len(self.transicoes) == 1:
+            return dt.astimezone(self.tz).replace(tzinfo=None)  # Offset fixo: o astimezone já é direto
+        epoch = dt.timestamp()
+        return _EPOCH + timedelta(seconds=epoch + self.offset(epoch))
+
+    def locais_epoch(self, epochs):
+        """Array NumPy de epochs UTC -> epochs "locais" (segundos desde 1970-01-01 no horário local)"""
+        import numpy as np
+
+        epochs = np.asarray(epochs, dtype=np.int64)
+        if self.transicoes is None:
+            return np.array([int((self.local(datetime.fromtimestamp(int(t), UTC)) - _EPOCH).total_seconds())
+                             for t in epochs], dtype=np.int64)
+        limites = np.array(self.transicoes[1:], dtype=np.float64)
+        indices = np.searchsorted(limites, epochs, side='right')
+        return epochs + np.array(self.offsets, dtype=np.int64)[indices]
@@ -0,0 +1,241 @@
+"""Leitura em streaming de feeds .ics, bloco a bloco.
+
+Em vez de montar o Calendar inteiro com Calendar.from_ical, os VEVENTs são
+lidos um por vez e pré-checados (DTSTART, RRULE UNTIL/COUNT) contra a janela
+da sprint. Só os que podem cair na janela seguem para o icalendar, junto com
+os VTIMEZONE e o cabeçalho do VCALENDAR.
+"""
+import mmap
+from datetime import date, timedelta
+
+# Folga para fusos horários: a data crua do DTSTART pode estar até ~1 dia
+# deslocada da data local/UTC real.
+FOLGA = timedelta(days=1)
+
+# Duração (em dias) de um período de cada FREQ, usada para limitar COUNT. Só
+# DAILY e WEEKLY: em MONTHLY/YEARLY o dateutil pula os meses/anos em que a
+# data do DTSTART não existe (dia 29-31, 29/02), então COUNT ocorrências
+# podem ir bem além de COUNT períodos.
+_DIAS_POR_FREQ = {
+    'DAILY': 1,
+    'WEEKLY': 7,
+}
+
+
+# Num mmap, as páginas já lidas são devolvidas a cada LIBERAR_A_CADA bytes
+LIBERAR_A_CADA = 8 * 1024 * 1024
+
+
+def liberar_paginas(fonte, inicio, fim):
+    """Devolve ao sistema as páginas de um mmap entre `inicio` e `fim` (já lidas)
+
+    Retorna o novo início (alinhado à página). Sem efeito em bytes ou em
+    plataformas sem madvise; um mmap de arquivo relê do disco se preciso.
+    """
+    fim -= fim % mmap.PAGESIZE
+    if fim <= inicio:
+        return inicio
+    if isinstance(fonte, mmap.mmap) and hasattr(mmap, 'MADV_DONTNEED'):
+        fonte.madvise(mmap.MADV_DONTNEED, inicio, fim - inicio)
+    return fim
+
+
+def _linhas_fisicas(fonte):
+    """Gera as linhas físicas (sem CRLF) de bytes, mmap ou de um iterável de blocos de bytes"""
+    if hasattr(fonte, 'find'):
+        pos = 0
+        liberado = 0
+        tamanho = len(fonte)
+        while pos < tamanho:
+            fim = fonte.find(b'\n', pos)
+            if fim == -1:
+                fim = tamanho
+            yield fonte[pos:fim].rstrip(b'\r')
+            pos = fim + 1
+            if pos - liberado >= LIBERAR_A_CADA:
+                liberado = liberar_paginas(fonte, liberado, pos)
+        return
+
+    resto = b''
+    for bloco in fonte:
+        if not bloco:
+            continue
+        partes = (resto + bloco).split(b'\n')
+        resto = partes.pop()
+        for parte in partes:
+            yield parte.rstrip(b'\r')
+    if resto:
+        yield resto.rstrip(b'\r')
+
+
+def iterar_linhas(fonte):
+    """Gera as linhas lógicas do .ics, desfazendo o folding (RFC 5545 3.1)"""
+    atual = None
+    for linha in _linhas_fisicas(fonte):
+        if linha[:1] in (b' ', b'\t'):
+            if atual is not None:
+                atual += linha[1:]
+            continue
+        if atual is not None:
+            yield atual
+        atual = linha
+    if atual is not None:
+        yield atual
+
+
+def _separar(linha):
+    """Separa 'NOME;PARAMS:VALOR' em (NOME, VALOR), respeitando aspas nos parâmetros"""
+    entre_aspas = False
+    for i, c in enumerate(linha):
+        if c == 0x22:  # "
+            entre_aspas = not entre_aspas
+        elif c == 0x3A and not entre_aspas:  # :
+            cabecalho = linha[:i]
+            nome = cabecalho.split(b';', 1)[0].upper()
+            return nome, linha[i + 1:]
+    return linha.upper(), b''
+
+
+def _data(valor):
+    """Data (ano, mês, dia) de um valor DATE/DATE-TIME cru, ou None"""
+    try:
+        texto = valor[:8].decode('ascii')
+        return date(int(texto[:4]), int(texto[4:6]), int(texto[6:8]))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _partes_rrule(valor):
+    partes = {}
+    for parte in valor.decode('utf-8', 'replace').upper().split(';'):
+        if '=' in parte:
+            chave, val = parte.split('=', 1)
+            partes[chave] = val
+    return partes
+
+
+def _fim_por_count(dtstart, partes):
+    """Limite superior da última ocorrência de uma RRULE com COUNT, ou None se não der para limitar"""
+    freq = partes.get('FREQ')
+    if freq not in _DIAS_POR_FREQ:
+        return None
+    extras = {k for k in partes if k.startswith('BY')}
+    # Com BY* a regra pode pular períodos inteiros (ex: BYMONTHDAY=31); só
+    # limitamos os casos em que todo período tem ao menos uma ocorrência.
+    if extras and not (freq == 'WEEKLY' and extras == {'BYDAY'}):
+        return None
+    try:
+        count = int(partes['COUNT'])
+        intervalo = int(partes.get('INTERVAL', '1'))
+    except ValueError:
+        return None
+    dias = count * intervalo * _DIAS_POR_FREQ[freq]
+    return dtstart + timedelta(days=int(dias) + 1)
+
+
+def pode_sobrepor(propriedades, data_inicio, data_fim):
+    """Pré-checagem barata: o VEVENT pode gerar ou substituir ocorrência dentro de [data_inicio, data_fim]?
+
+    Na dúvida (valor que não dá para interpretar) retorna True.
+    """
+    dtstart = _data(propriedades.get(b'DTSTART', b''))
+    if dtstart is None:
+        return True
+
+    limite_inicio = data_inicio - FOLGA
+    limite_fim = data_fim + FOLGA
+
+    # Substituição de ocorrência da janela: precisa chegar ao processamento
+    # mesmo se foi movida para fora, para suprimir a ocorrência original
+    recurrence_id = _data(propriedades.get(b'RECURRENCE-ID', b''))
+    if recurrence_id is not None and limite_inicio <= recurrence_id <= limite_fim:
+        return True
+
+    if dtstart > limite_fim:
+        return False
+
+    rrule = propriedades.get(b'RRULE')
+    if rrule is None:
+        return dtstart >= limite_inicio
+
+    partes = _partes_rrule(rrule)
+    if 'UNTIL' in partes:
+        until = _data(partes['UNTIL'].encode('ascii', 'replace'))
+        if until is not None and until < limite_inicio:
+            return False
+    if 'COUNT' in partes:
+        ultimo = _fim_por_count(dtstart, partes)
+        if ultimo is not None and ultimo < limite_inicio:
+            return False
+    return True
+
+
+_PROPRIEDADES_CHECADAS = (b'DTSTART', b'RRULE', b'RECURRENCE-ID')
+
+
+def filtrar_calendario(fonte, data_inicio, data_fim, estatisticas=None):
+    """Monta um .ics reduzido só com o que pode cair na janela
+
+    `fonte` pode ser bytes, mmap ou um iterável de blocos de bytes. Se
+    `estatisticas` for um dict, recebe as contagens 'vevents' e 'mantidos'.
+    """
+    cabecalho = []
+    fusos = []
+    eventos = []
+    total = 0
+    mantidos = 0
+
+    bloco = None        # Linhas do componente de primeiro nível sendo lido
+    tipo_bloco = None
+    profundidade = 0
+    propriedades = {}
+
+    for linha in iterar_linhas(fonte):
+        maiuscula = linha.upper()
+
+        if bloco is None:
+            if maiuscula.startswith(b'BEGIN:'):
+                tipo = maiuscula[6:].strip()
+                if tipo == b'VCALENDAR':
+                    continue
+                bloco = [linha]
+                tipo_bloco = tipo
+                profundidade = 1
+                propriedades = {}
+            elif maiuscula.startswith(b'END:VCALENDAR'):
+                continue
+            elif linha:
+                cabecalho.append(linha)
+            continue
+
+        bloco.append(linha)
+        if maiuscula.startswith(b'BEGIN:'):
+            profundidade += 1
+            continue
+        if maiuscula.startswith(b'END:'):
+            profundidade -= 1
+            if profundidade > 0:
+                continue
+
+            if tipo_bloco == b'VTIMEZONE':
+                fusos.append(b'\r\n'.join(bloco))
+            elif tipo_bloco == b'VEVENT':
+                total += 1
+                if pode_sobrepor(propriedades, data_inicio, data_fim):
+                    mantidos += 1
+                    eventos.append(b'\r\n'.join(bloco))
+            bloco = None
+            continue
+
+        # Só propriedades do próprio VEVENT (não de VALARM aninhado)
+        if tipo_bloco == b'VEVENT' and profundidade == 1:
+            nome, valor = _separar(linha)
+            if nome in _PROPRIEDADES_CHECADAS:
+                propriedades[nome] = valor
+
+    if estatisticas is not None:
+        estatisticas['vevents'] = total
+        estatisticas['mantidos'] = mantidos
+
+    partes = [b'BEGIN:VCALENDAR'] + cabecalho + fusos + eventos + [b'END:VCALENDAR', b'']
+    return b'\r\n'.join(partes)
@@ -0,0 +1,198 @@
+"""Estado dos eventos exibidos, independente da interface."""
+
+
+def _horario_local(dt, fuso):
+    """datetime com timezone -> naive no fuso (ConversorFuso); naive é mantido"""
+    if fuso is not None:
+        return fuso.local(dt)
+    return dt.replace(tzinfo=None)
+
+
+class TotaisSprint:
+    """Somas dos eventos selecionados, atualizadas em O(1) a cada mudança
+
+    `como_dict()` é o formato lido por sprint_engine.texto_totais.
+    """
+    __slots__ = ('total_minutos', 'total_excess', 'selecionados')
+
+    def __init__(self):
+        self.limpar()
+
+    def limpar(self):
+        self.total_minutos = 0
+        self.total_excess = 0
+        self.selecionados = 0
+
+    def adicionar(self, minutos, excess):
+        self.total_minutos += minutos
+        self.total_excess += excess
+        self.selecionados += 1
+
+    def remover(self, minutos, excess):
+        self.total_minutos -= minutos
+        self.total_excess -= excess
+        self.selecionados -= 1
+
+    def ajustar_excedentes(self, antigo, novo):
+        self.total_excess += novo - antigo
+
+    def como_dict(self):
+        return {
+            'total_minutos': self.total_minutos,
+            'total_excess': self.total_excess,
+            'total_final': self.total_minutos + self.total_excess,
+            'selecionados': self.selecionados,
+        }
+
+
+class EventoSprint:
+    """Um evento exibido na sprint (do calendário ou local)"""
+    __slots__ = ('inicio', 'fim', 'descricao', 'is_local', 'selecionado', 'excess_minutes',
+                 'minutos', 'local_event', 'chave', 'inicio_local', 'fim_local')
+
+    def __init__(self, inicio, fim, descricao, is_local, excess_minutes=0, local_event=None, chave=None,
+                 selecionado=True, fuso=None, inicio_local=None):
+        self.inicio = inicio
+        self.fim = fim
+        self.descricao = descricao
+        self.is_local = is_local
+        self.selecionado = selecionado
+        self.excess_minutes = excess_minutes
+        self.minutos = int((fim - inicio).total_seconds() // 60)
+        self.local_event = local_event  # Referência ao dict do evento local, se houver
+        self.chave = chave              # Identidade estável (UID/RECURRENCE-ID) do evento do calendário
+        # Horário local naive, convertido uma vez (usado pela agregação vetorizada)
+        self.inicio_local = inicio_local if inicio_local is not None else _horario_local(inicio, fuso)
+        self.fim_local = _horario_local(fim, fuso)
+
+
+class ModeloEventos:
+    """Fonte da verdade dos eventos da sprint: interface, totais e exportação leem daqui
+
+    Cada evento recebe um id inteiro estável enquanto estiver no modelo; a
+    ordem de iteração é a de inserção. `fuso` (ConversorFuso) dá os
+    horários locais dos eventos.
+    """
+
+    def __init__(self, fuso=None):
+        self.fuso = fuso
+        self.eventos = {}
+        self.totais = TotaisSprint()
+        self._proximo_id = 0
+        self._invalidar_intervalos()
+
+    def __len__(self):
+        return len(self.eventos)
+
+    def __iter__(self):
+        return iter(self.eventos.values())
+
+    def __getitem__(self, evento_id):
+        return self.eventos[evento_id]
+
+    def __contains__(self, evento_id):
+        return evento_id in self.eventos
+
+    def itens(self):
+        return self.eventos.items()
+
+    def limpar(self):
+        self.eventos = {}
+        self.totais.limpar()
+        self._invalidar_intervalos()
+
+    def _invalidar_intervalos(self):
+        """Descarta os arrays de horários (eventos incluídos, removidos ou com novo horário)"""
+        self._intervalos = None         # (posição por id, inícios, fins, máscara de seleção)
+        self._sem_sobreposicao = None
+
+    def minutos_sem_sobreposicao(self):
+        """Minutos da união dos selecionados, guardado até a seleção ou os horários mudarem
+
+        Os arrays de horários só são remontados quando eventos entram, saem ou
+        mudam de horário; alternar a seleção só marca a máscara.
+        """
+        if self._sem_sobreposicao is None:
+            import numpy as np  # Import tardio: numpy fica fora da abertura da janela
+
+            import agregacao
+
+            if self._intervalos is None:
+                inicios, fins, _ = agregacao.arrays_de_eventos(self.eventos.values())
+                posicoes = {evento_id: i for i, evento_id in enumerate(self.eventos)}
+                mascara = np.array([e.selecionado for e in self.eventos.values()], dtype=bool)
+                self._intervalos = (posicoes, inicios.astype(np.int64),
+                                    fins.astype(np.int64), mascara)
+            _, inicios, fins, mascara = self._intervalos
+            self._sem_sobreposicao = agregacao.total_sem_sobreposicao(inicios[mascara], fins[mascara])
+        return self._sem_sobreposicao
+
+    def adicionar(self, inicio, fim, descricao, is_local, excess_minutes=0, local_event=None, chave=None,
+                  inicio_local=None):
+        """Inclui um evento; `inicio_local` evita reconverter um início já convertido pelo chamador"""
+        evento = EventoSprint(inicio, fim, descricao, is_local, excess_minutes, local_event, chave,
+                              fuso=self.fuso, inicio_local=inicio_local)
+        evento_id = self._proximo_id
+        self._proximo_id += 1
+        self.eventos[evento_id] = evento
+        if evento.selecionado:
+            self.totais.adicionar(evento.minutos, evento.excess_minutes)
+        self._invalidar_intervalos()
+        return evento_id
+
+    def remover(self, evento_id):
+        evento = self.eventos.pop(evento_id)
+        if evento.selecionado:
+            self.totais.remover(evento.minutos, evento.excess_minutes)
+        self._invalidar_intervalos()
+        return evento
+
+    def definir_selecao(self, evento_id, selecionado):
+        evento = self.eventos[evento_id]
+        if evento.selecionado == selecionado:
+            return evento
+        evento.selecionado = selecionado
+        if selecionado:
+            self.totais.adicionar(evento.minutos, evento.excess_minutes)
+        else:
+            self.totais.remover(evento.minutos, evento.excess_minutes)
+        if self._intervalos is not None:
+            self._intervalos[3][self._intervalos[0][evento_id]] = selecionado
+        self._sem_sobreposicao = None
+        return evento
+
+    def alternar_selecao(self, evento_id):
+        return self.definir_selecao(evento_id, not self.eventos[evento_id].selecionado)
+
+    def atualizar_horario(self, evento_id, inicio, fim, descricao):
+        """Novo horário/descrição de um evento já exibido, mantendo seleção e excedentes"""
+        evento = self.eventos[evento_id]
+        minutos = int((fim - inicio).total_seconds() // 60)
+        if evento.selecionado:
+            self.totais.total_minutos += minutos - evento.minutos
+        evento.inicio, evento.fim, evento.descricao, evento.minutos = inicio, fim, descricao, minutos
+        evento.inicio_local = _horario_local(inicio, self.fuso)
+        evento.fim_local = _horario_local(fim, self.fuso)
+        self._invalidar_intervalos()
+        return evento
+
+    def definir_excedentes(self, evento_id, excess_minutes):
+        evento = self.eventos[evento_id]
+        if evento.selecionado:
+            self.totais.ajustar_excedentes(evento.excess_minutes, excess_minutes)
+        evento.excess_minutes = excess_minutes
+        return evento
+
+    def ids_por_chave(self):
+        """{chave: [ids]} dos eventos do calendário (base do diff nas recargas)
+
+        Uma lista recriada com chaves repetidas deixa mais de um id na chave.
+        """
+        ids = {}
+        for evento_id, evento in self.eventos.items():
+            if not evento.is_local and evento.chave is not None:
+                ids.setdefault(evento.chave, []).append(evento_id)
+        return ids
+
+    def selecionados(self):
+        return [evento for evento in self.eventos.values() if evento.selecionado]
@@ -0,0 +1,141 @@
+"""Medição de tempo (spans nomeados) e contadores do carregamento.
+
+Uso:
+
+    from perfil import PERFIL
+
+    with PERFIL.span("download"):
+        ...
+    PERFIL.contar("ocorrencias", len(eventos))
+
+O resumo vai para a barra de status da interface (ou para o stderr no
+cli.py). Opcionalmente grava um trace JSON (formato do chrome://tracing e do
+Perfetto) e captura cProfile do carregamento.
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Ordem dos spans no resumo (os demais vêm depois, por ordem de aparição)
+ORDEM_RESUMO = (
+    'download', 'filtro_streaming', 'parse_ical', 'walk_vevents', 'expansao_rrule', 'filtro_ocorrencias',
+    'aplicar_filtros', 'montar_lista', 'calcular_total', 'exportacao',
+)
+
+
+class Perfil:
+    """Tempos acumulados por span, contadores e (opcional) trace de cada span
+
+    Seguro entre threads: o carregamento roda no ThreadPoolExecutor e a
+    montagem da lista na thread da interface.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.debug_ativo = False
+        self.trace_ativo = False
+        self.limpar()
+
+    def limpar(self):
+        with self._lock:
+            self.spans = {}      # nome -> [chamadas, total_s, max_s]
+            self.contadores = {}
+            self.trace = []      # (nome, inicio, fim, thread) quando trace_ativo
+            self._origem = time.perf_counter()
+
+    def _somar(self, nome, duracao, chamadas):
+        acumulado = self.spans.get(nome)
+        if acumulado is None:
+            self.spans[nome] = [chamadas, duracao, duracao]
+        else:
+            acumulado[0] += chamadas
+            acumulado[1] += duracao
+            acumulado[2] = max(acumulado[2], duracao)
+
+    def registrar(self, nome, inicio, fim):
+        """Soma um intervalo já medido (perf_counter) ao span `nome`"""
+        with self._lock:
+            self._somar(nome, fim - inicio, 1)
+            if self.trace_ativo:
+                self.trace.append((nome, inicio, fim, threading.get_ident()))
+
+    def acumular(self, nome, duracao, chamadas=1):
+        """Soma um tempo total medido em laço (ex: por regra RRULE); não entra no trace"""
+        with self._lock:
+            self._somar(nome, duracao, chamadas)
+
+    @contextmanager
+    def span(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nome, inicio, time.perf_counter())
+
+    def contar(self, nome, quantidade=1):
+        with self._lock:
+            self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def debug(self, mensagem):
+        """Mensagens de diagnóstico: só aparecem com debug_ativo (config 'debug_log')
+
+        Em laços, teste debug_ativo antes de montar a mensagem.
+        """
+        if self.debug_ativo:
+            print(f"[DEBUG] {mensagem}")
+
+    def como_dict(self):
+        with self._lock:
+            return {
+                'spans': {nome: {'chamadas': n, 'total_ms': round(total * 1000, 3), 'max_ms': round(maximo * 1000, 3)}
+                          for nome, (n, total, maximo) in self.spans.items()},
+                'contadores': dict(self.contadores),
+            }
+
+    def resumo(self):
+        """Uma linha para a barra de status: tempos dos spans e contadores"""
+        with self._lock:
+            nomes = [n for n in ORDEM_RESUMO if n in self.spans]
+            nomes += [n for n in self.spans if n not in ORDEM_RESUMO]
+            partes = [f"{nome} {self.spans[nome][1] * 1000:.0f}ms" for nome in nomes]
+            partes += [f"{nome}: {valor}" for nome, valor in self.contadores.items()]
+        return " | ".join(partes)
+
+    def gravar_trace(self, caminho):
+        """Trace JSON (Trace Event Format): abre no chrome://tracing ou no Perfetto"""
+        with self._lock:
+            eventos = [
+                {'name': nome, 'ph': 'X', 'pid': 0, 'tid': thread,
+                 'ts': round((inicio - self._origem) * 1e6), 'dur': round((fim - inicio) * 1e6)}
+                for nome, inicio, fim, thread in self.trace
+            ]
+            contadores = dict(self.contadores)
+        try:
+            with open(caminho, 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': eventos, 'otherData': contadores}, f)
+        except Exception as e:
+            print(f"Erro ao gravar trace de perfil: {e}")
+
+    @contextmanager
+    def cprofile(self, caminho):
+        """Captura cProfile da thread atual em `caminho` (.prof); sem caminho não faz nada"""
+        if not caminho:
+            yield
+            return
+        import cProfile
+
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            try:
+                perfil.dump_stats(caminho)
+            except Exception as e:
+                print(f"Erro ao gravar cProfile: {e}")
+
+
+# Instância compartilhada pelo motor, exportação e interface
+PERFIL = Perfil()
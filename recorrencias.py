@@ -0,0 +1,150 @@
+"""Compilação de RRULE/EXDATE com cache LRU entre recargas."""
+import hashlib
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date, datetime
+
+from pytz import UTC
+
+from perfil import PERFIL
+
+
+def normalizar_rrule(rrule_str):
+    """Garante que o UNTIL do RRULE esteja em UTC (formato YYYYMMDDTHHMMSSZ)"""
+    if 'UNTIL=' not in rrule_str:
+        return rrule_str
+
+    parts = rrule_str.split(';')
+    new_parts = []
+    for part in parts:
+        if part.startswith('UNTIL='):
+            until_val = part[6:]
+            if until_val.endswith('Z'):
+                until_val = until_val[:-1]
+            try:
+                until_dt = datetime.strptime(until_val, '%Y%m%dT%H%M%S')
+            except ValueError:
+                until_dt = datetime.strptime(until_val, '%Y%m%d')
+            until_dt = UTC.localize(until_dt)
+            part = f"UNTIL={until_dt.strftime('%Y%m%dT%H%M%SZ')}"
+        new_parts.append(part)
+    return ';'.join(new_parts)
+
+
+def _propriedades_exdate(componente):
+    exdate = componente.get('EXDATE')
+    if exdate is None:
+        return []
+    return exdate if isinstance(exdate, list) else [exdate]
+
+
+def extrair_exdates(componente):
+    """EXDATEs do VEVENT convertidos para UTC quando vierem sem timezone"""
+    exdates = []
+    for ex in _propriedades_exdate(componente):
+        exdates.extend(d.dt for d in ex.dts)
+    return [UTC.localize(ex) if isinstance(ex, datetime) and ex.tzinfo is None
+            else ex for ex in exdates]
+
+
+class IndiceExdates:
+    """Índice ordenado de EXDATEs em segundos epoch, com tolerância de um minuto
+
+    Montado uma vez por série; cada consulta é uma busca binária em vez de
+    percorrer todas as exceções.
+    """
+    __slots__ = ('instantes',)
+
+    TOLERANCIA = 60  # segundos
+
+    def __init__(self, exdates):
+        instantes = []
+        for ex in exdates:
+            if not isinstance(ex, datetime) and isinstance(ex, date):
+                # EXDATE só com data: meia-noite UTC, como o DTSTART de dia inteiro
+                ex = UTC.localize(datetime.combine(ex, datetime.min.time()))
+            instantes.append(ex.timestamp())
+        instantes.sort()
+        self.instantes = instantes
+
+    def __len__(self):
+        return len(self.instantes)
+
+    def contem(self, ocorrencia):
+        """True se houver EXDATE a menos de um minuto da ocorrência"""
+        if not self.instantes:
+            return False
+        t = ocorrencia.timestamp()
+        i = bisect_right(self.instantes, t - self.TOLERANCIA)
+        return i < len(self.instantes) and self.instantes[i] < t + self.TOLERANCIA
+
+
+def compilar_regra(componente, dtstart):
+    """Retorna (rule, IndiceExdates) de um VEVENT recorrente"""
+    from dateutil.rrule import rrulestr
+
+    rrule_str = normalizar_rrule(componente['RRULE'].to_ical().decode('utf-8'))
+    rule = rrulestr(rrule_str, dtstart=dtstart)
+    return rule, IndiceExdates(extrair_exdates(componente))
+
+
+class CacheRecorrencias:
+    """Cache LRU de regras compiladas, chaveado por UID + SEQUENCE + DTSTART
+
+    O DTEND e o texto do RRULE e dos EXDATEs (resumido num hash) também
+    entram na chave: o Outlook nem sempre incrementa o SEQUENCE ao mudar a
+    regra ou excluir uma ocorrência da série.
+    """
+
+    def __init__(self, max_itens=2000):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def chave(componente, dtstart):
+        uid = componente.get('UID')
+        if uid is None:
+            return None
+        regras = componente.get('RRULE')
+        regras = regras if isinstance(regras, list) else [regras]
+        texto = hashlib.sha1()
+        for propriedade in regras + _propriedades_exdate(componente):
+            if propriedade is not None:
+                texto.update(propriedade.to_ical())
+                texto.update(b'\n')
+        dtend = componente.get('DTEND')
+        return (
+            str(uid),
+            int(componente.get('SEQUENCE', 0)),
+            dtstart,
+            dtend.to_ical() if dtend is not None else None,
+            texto.digest(),
+        )
+
+    def obter(self, componente, dtstart):
+        """Retorna (rule, IndiceExdates) do cache ou compila e guarda"""
+        chave = self.chave(componente, dtstart)
+        if chave is not None:
+            with self._lock:
+                item = self._itens.get(chave)
+                if item is not None:
+                    self._itens.move_to_end(chave)
+                    PERFIL.contar("cache_regras_hits")
+                    return item
+
+        item = compilar_regra(componente, dtstart)
+
+        with self._lock:
+            PERFIL.contar("cache_regras_misses")
+            if chave is not None:
+                self._itens[chave] = item
+                self._itens.move_to_end(chave)
+                while len(self._itens) > self.max_itens:
+                    self._itens.popitem(last=False)
+        return item
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
@@ -0,0 +1,76 @@
+"""Relatório de várias sprints a partir de um único parse do calendário."""
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import agregacao
+import sprint_engine as engine
+
+
+def periodos_sprints(data_inicio, quantidade, data_fim=None, duas_semanas=True, anteriores=True):
+    """Lista de (inicio, fim) de `quantidade` sprints consecutivas
+
+    A duração segue a regra da interface (periodo_sprint). Com `anteriores`,
+    a última sprint da lista é a selecionada (ex: "últimas dez sprints");
+    senão, a selecionada é a primeira.
+    """
+    inicio, fim = engine.periodo_sprint(data_inicio, data_fim, duas_semanas)
+    duracao = (fim - inicio).days + 1
+    primeira = inicio - timedelta(days=duracao * (quantidade - 1)) if anteriores else inicio
+    return [
+        (primeira + timedelta(days=duracao * i), primeira + timedelta(days=duracao * (i + 1) - 1))
+        for i in range(quantidade)
+    ]
+
+
+def resumir_sprints(eventos, periodos, fuso, entregas=(), obter_excedentes=None, eventos_locais=()):
+    """Totais e entregas por sprint
+
+    `eventos` são as tuplas (inicio, fim, descricao, chave) de um único
+    engine.carregar_eventos_calendario cobrindo todas as sprints, convertidas
+    de uma vez pelo `fuso` (ConversorFuso); `obter_excedentes(inicio_local,
+    descricao, chave)` devolve os minutos excedentes de cada um. `eventos_locais` são dicts do
+    LocalEventStore e `entregas` as (data_str, tarefa) do período, ordenadas
+    por data (EntregasStore.no_periodo). Cada evento conta na sprint do seu
+    início local.
+    """
+    inicios, fins, _ = agregacao.arrays_de_ocorrencias(eventos, fuso)
+    if obter_excedentes:
+        excedentes = np.array([
+            obter_excedentes(inicio_local, descricao, chave)
+            for inicio_local, (_, _, descricao, chave) in zip(inicios.astype(datetime), eventos)
+        ], dtype=np.int64)
+    else:
+        excedentes = np.zeros(len(eventos), dtype=np.int64)
+
+    eventos_locais = list(eventos_locais)
+    if eventos_locais:
+        inicios = np.concatenate([inicios, np.array([e['start'] for e in eventos_locais], dtype='datetime64[m]')])
+        fins = np.concatenate([fins, np.array([e['end'] for e in eventos_locais], dtype='datetime64[m]')])
+        excedentes = np.concatenate([excedentes, np.array([e.get('excess_minutes', 0) for e in eventos_locais],
+                                                          dtype=np.int64)])
+    ordem = np.argsort(inicios, kind='stable')
+    inicios, fins, excedentes = inicios[ordem], fins[ordem], excedentes[ordem]
+
+    # Fatias contíguas por sprint no array ordenado
+    limites = np.array(
+        [datetime.combine(ini, datetime.min.time()) for ini, _ in periodos]
+        + [datetime.combine(periodos[-1][1] + timedelta(days=1), datetime.min.time())],
+        dtype='datetime64[m]'
+    )
+    cortes = np.searchsorted(inicios, limites, side='left')
+
+    entregas = list(entregas)
+    datas_entregas = [data_str for data_str, _ in entregas]
+
+    resumo = []
+    for i, (ini, fim) in enumerate(periodos):
+        fatia = slice(cortes[i], cortes[i + 1])
+        totais = agregacao.agregar(inicios[fatia], fins[fatia], excedentes[fatia])
+        totais['inicio'] = ini
+        totais['fim'] = fim
+        totais['entregas'] = entregas[bisect_left(datas_entregas, ini.isoformat()):
+                                      bisect_right(datas_entregas, fim.isoformat())]
+        resumo.append(totais)
+    return resumo
@@ -0,0 +1,371 @@
+"""Motor da sprint sem dependência de interface.
+
+Pipeline: download -> parse -> expansão de recorrências -> merge de conflitos
+-> agregação. Tudo aqui retorna estruturas simples (tuplas, listas e dicts) e
+pode ser importado sem tkinter, tkcalendar ou openpyxl. requests e icalendar
+só são importados no primeiro download/parse, para não atrasar a abertura da
+interface.
+"""
+import mmap
+import os
+import tempfile
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from pytz import UTC
+
+import ics_stream
+from cache_ocorrencias import hash_feed
+from feed_cache import gravar_em_blocos
+from perfil import PERFIL
+from recorrencias import CacheRecorrencias
+
+TZ_PADRAO = 'America/Sao_Paulo'
+
+# Tamanho máximo do feed baixado (config 'max_feed_mb' / --limite-mb)
+LIMITE_FEED_MB = 100
+
+# Regras compiladas sobrevivem entre recargas e trocas de data da sprint
+CACHE_RECORRENCIAS = CacheRecorrencias()
+
+
+class CarregamentoCancelado(Exception):
+    """Levantada quando o carregamento foi cancelado ou substituído por outro"""
+
+
+def verificar_cancelamento(cancelado):
+    if cancelado is not None and cancelado():
+        raise CarregamentoCancelado()
+
+
+def periodo_sprint(data_inicio, data_fim=None, duas_semanas=True):
+    """Retorna (data_inicio, data_fim) da sprint seguindo a regra da interface"""
+    if duas_semanas or data_fim is None:
+        return data_inicio, data_inicio + timedelta(days=13)
+    return data_inicio, data_fim
+
+
+def normalizar_url(url):
+    url = url.strip()
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+
+@contextmanager
+def abrir_ics(caminho):
+    """Conteúdo do .ics mapeado em memória (mmap somente leitura)
+
+    O parse em streaming lê direto do mapa: só as páginas tocadas entram na
+    memória e nenhuma cópia do arquivo inteiro é feita.
+    """
+    with open(caminho, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''  # mmap não mapeia arquivo vazio
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as conteudo:
+            yield conteudo
+
+
+@contextmanager
+def abrir_url(url, timeout=10, cache=None, limite_mb=LIMITE_FEED_MB):
+    """Baixa o calendário em blocos para o disco e entrega o conteúdo como abrir_ics
+
+    Com `cache` (FeedCache) o corpo fica no diretório do cache; sem ele, num
+    arquivo temporário apagado ao sair. Feeds acima de `limite_mb`
+    (descomprimidos) são recusados com ValueError.
+    """
+    limite_bytes = int(limite_mb * 1024 * 1024) if limite_mb else None
+    url = normalizar_url(url)
+    with tempfile.TemporaryDirectory(prefix='sprint_ics_') as temporario, ExitStack() as downloads:
+        with PERFIL.span("download"):
+            if cache is not None:
+                caminho = downloads.enter_context(
+                    cache.baixar_para_arquivo(url, timeout=timeout, limite_bytes=limite_bytes))
+            else:
+                import requests
+
+                caminho = os.path.join(temporario, 'calendario.ics')
+                response = requests.get(url, timeout=timeout, stream=True)
+                if not response.ok:
+                    response.close()
+                    response.raise_for_status()
+                gravar_em_blocos(response, caminho, limite_bytes)
+        with abrir_ics(caminho) as conteudo:
+            yield conteudo
+
+
+def parse_calendario(ics_data, data_inicio=None, data_fim=None):
+    """Monta o Calendar; com período informado usa o parse em streaming e só
+    constrói os VEVENTs que podem cair na janela"""
+    if data_inicio is not None and data_fim is not None:
+        estatisticas = {}
+        with PERFIL.span("filtro_streaming"):
+            ics_data = ics_stream.filtrar_calendario(ics_data, data_inicio, data_fim, estatisticas)
+        # VEVENTs descartados pelo filtro vs. os que seguem para o parse
+        PERFIL.contar("vevents_descartados", estatisticas['vevents'] - estatisticas['mantidos'])
+        PERFIL.contar("vevents_mantidos", estatisticas['mantidos'])
+    elif isinstance(ics_data, mmap.mmap):
+        ics_data = ics_data[:]  # Calendar.from_ical só aceita bytes/str
+    from icalendar import Calendar
+
+    with PERFIL.span("parse_ical"):
+        return Calendar.from_ical(ics_data)
+
+
+def para_utc(valor):
+    """Converte DATE/DATE-TIME do icalendar em datetime com timezone (UTC se vier sem)"""
+    if isinstance(valor, datetime):
+        if valor.tzinfo is None:
+            return UTC.localize(valor)
+        return valor
+    return UTC.localize(datetime.combine(valor, datetime.min.time()))
+
+
+def indexar_substituicoes(componentes):
+    """Mapa UID -> instantes (epoch) das ocorrências substituídas via RECURRENCE-ID"""
+    substituidas = {}
+    for componente in componentes:
+        recurrence_id = componente.get('RECURRENCE-ID')
+        uid = componente.get('UID')
+        if recurrence_id is None or uid is None:
+            continue
+        instante = int(para_utc(recurrence_id.dt).timestamp())
+        substituidas.setdefault(str(uid), set()).add(instante)
+    return substituidas
+
+
+def chave_evento(uid, instante, descricao=None, unico=False):
+    """Identidade estável de uma ocorrência: UID + instante original (RECURRENCE-ID) em UTC
+
+    Eventos `unico` (sem RRULE nem RECURRENCE-ID) ficam só com o UID, para a
+    chave sobreviver a uma mudança de horário. Sem UID, cai para a descrição
+    (e o instante) no lugar dele.
+    """
+    if unico and uid is not None:
+        return str(uid)
+    base = str(uid) if uid is not None else f"sem-uid:{descricao}"
+    return f"{base}|{instante.astimezone(UTC).strftime('%Y%m%dT%H%M%SZ')}"
+
+
+def processar_calendario(calendario, data_inicio, data_fim, cancelado=None, cache_recorrencias=None):
+    """Expande os VEVENTs do calendário dentro do período, retornando (inicio, fim, descricao, chave)
+
+    `chave` é a identidade estável da ocorrência (ver chave_evento).
+
+    `cancelado` é um callable opcional consultado a cada VEVENT; se retornar
+    True o processamento é interrompido com CarregamentoCancelado. As regras
+    compiladas vêm de `cache_recorrencias` (por padrão CACHE_RECORRENCIAS).
+    """
+    if cache_recorrencias is None:
+        cache_recorrencias = CACHE_RECORRENCIAS
+    eventos = []
+
+    # Converter para datetime no início do dia
+    inicio_periodo = datetime.combine(data_inicio, datetime.min.time())
+    fim_periodo = datetime.combine(data_fim, datetime.max.time())  # Fim do último dia
+
+    # Converter para UTC
+    inicio_periodo_utc = UTC.localize(inicio_periodo)
+    fim_periodo_utc = UTC.localize(fim_periodo)
+
+    with PERFIL.span("walk_vevents"):
+        componentes = [c for c in calendario.walk() if c.name == "VEVENT"]
+        substituidas = indexar_substituicoes(componentes)
+    PERFIL.contar("eventos", len(componentes))
+    # Expansão e EXDATE são medidas em acumuladores locais (um registro só no fim)
+    tempo_rrule = tempo_filtro = 0.0
+    regras = 0
+
+    for componente in componentes:
+        verificar_cancelamento(cancelado)
+
+        dtstart = para_utc(componente.get('dtstart').dt)
+        dtend = para_utc(componente.get('dtend').dt)
+        descricao = str(componente.get('summary', 'Sem descrição')).strip()
+        uid = componente.get('UID')
+        substituicao = 'RECURRENCE-ID' in componente
+
+        # Pular eventos cancelados
+        if 'cancelado' in descricao.lower():
+            continue
+        if substituicao and str(componente.get('STATUS', '')).upper() == 'CANCELLED':
+            continue
+
+        # Processar eventos recorrentes
+        if 'RRULE' in componente and not substituicao:
+            try:
+                rule, exdates = cache_recorrencias.obter(componente, dtstart)
+                # Ocorrências com RECURRENCE-ID são emitidas pelo próprio VEVENT de substituição
+                ignorar = substituidas.get(str(uid), ())
+
+                # Obter ocorrências dentro do período
+                t0 = perf_counter()
+                ocorrencias = rule.between(inicio_periodo_utc, fim_periodo_utc, inc=True)
+                t1 = perf_counter()
+                tempo_rrule += t1 - t0
+                regras += 1
+                # filtro_ocorrencias: laço inteiro (timezone, EXDATE, substituições e montagem das tuplas)
+                for occurrence in ocorrencias:
+                    if isinstance(occurrence, datetime):
+                        if occurrence.tzinfo is None:
+                            occurrence = UTC.localize(occurrence)
+
+                        # Verificar se não está nas exceções nem foi substituída
+                        if not exdates.contem(occurrence) and int(occurrence.timestamp()) not in ignorar:
+                            event_end = occurrence + (dtend - dtstart)
+                            if event_end > occurrence:  # Verificar se a duração é válida
+                                eventos.append((occurrence, event_end, descricao,
+                                                chave_evento(uid, occurrence, descricao)))
+                tempo_filtro += perf_counter() - t1
+
+            except Exception as e:
+                print(f"Erro ao processar evento recorrente {descricao}: {str(e)}")
+                continue
+        else:
+            # Evento único - verificar se está dentro do período
+            if inicio_periodo_utc <= dtstart <= fim_periodo_utc:
+                instante = para_utc(componente['RECURRENCE-ID'].dt) if substituicao else dtstart
+                eventos.append((dtstart, dtend, descricao,
+                                chave_evento(uid, instante, descricao, unico=not substituicao)))
+
+    PERFIL.acumular("expansao_rrule", tempo_rrule, regras)
+    PERFIL.acumular("filtro_ocorrencias", tempo_filtro, regras)
+    PERFIL.contar("ocorrencias", len(eventos))
+    return eventos
+
+
+# Como resolver eventos sobrepostos ao juntar (chave -> nome exibido)
+POLITICAS_CONFLITO = {
+    'maior_duracao': "Maior duração",
+    'uniao': "União",
+    'primeiro': "Primeiro",
+    'manter_todos': "Manter todos",
+}
+POLITICA_PADRAO = 'maior_duracao'
+
+
+def aplicar_filtros(eventos, politica=POLITICA_PADRAO):
+    """Remove cancelados e junta eventos sobrepostos numa varredura única (O(n log n))
+
+    Políticas para a descrição/chave do bloco juntado:
+    - 'maior_duracao': a do evento de maior duração (empate: o que começa antes)
+    - 'uniao': descrições distintas juntadas com " + ", chave do primeiro
+    - 'primeiro': a do evento que começa antes
+    - 'manter_todos': não junta nada, só ordena
+    """
+    if politica not in POLITICAS_CONFLITO:
+        raise ValueError(f"Política de conflito desconhecida: {politica}")
+
+    # Primeiro, remove eventos cancelados
+    eventos_validos = [e for e in eventos if 'cancelado' not in e[2].lower()]
+    eventos_validos.sort(key=lambda x: (x[0], x[1]))
+
+    if politica == 'manter_todos':
+        return eventos_validos
+
+    eventos_filtrados = []
+    bloco_inicio = bloco_fim = None
+    for inicio, fim, descricao, chave in eventos_validos:
+        # Verifica se há sobreposição com o bloco atual (encostar não conta)
+        if bloco_inicio is not None and inicio < bloco_fim:
+            bloco_fim = max(bloco_fim, fim)
+            if politica == 'maior_duracao':
+                duracao = fim - inicio
+                if duracao > maior_duracao:
+                    maior_duracao = duracao
+                    bloco_desc = descricao
+                    bloco_chave = chave
+            elif politica == 'uniao' and descricao not in descricoes:
+                descricoes.append(descricao)
+            continue
+
+        # Fecha o bloco anterior e começa um novo
+        if bloco_inicio is not None:
+            if politica == 'uniao':
+                bloco_desc = " + ".join(descricoes)
+            eventos_filtrados.append((bloco_inicio, bloco_fim, bloco_desc, bloco_chave))
+        bloco_inicio, bloco_fim = inicio, fim
+        bloco_desc, bloco_chave = descricao, chave
+        maior_duracao = fim - inicio
+        descricoes = [descricao]
+
+    if bloco_inicio is not None:
+        if politica == 'uniao':
+            bloco_desc = " + ".join(descricoes)
+        eventos_filtrados.append((bloco_inicio, bloco_fim, bloco_desc, bloco_chave))
+
+    return eventos_filtrados
+
+
+def carregar_eventos_calendario(ics_data, data_inicio, data_fim, progresso=None, cancelado=None,
+                                streaming=True, politica=POLITICA_PADRAO, cache_ocorrencias=None):
+    """Parse + expansão + merge de um feed .ics, ordenado por início (aplicar_filtros já ordena)
+
+    `progresso` recebe uma mensagem por etapa; `cancelado` segue a regra de
+    processar_calendario. Com `streaming=False` o feed inteiro é montado com
+    Calendar.from_ical, como antes. `politica` vai para aplicar_filtros.
+    Com `cache_ocorrencias` (CacheOcorrencias), um feed já expandido pula o
+    parse e a expansão; num miss, a expansão cobre o horizonte do cache.
+    """
+    def etapa(mensagem):
+        verificar_cancelamento(cancelado)
+        if progresso is not None:
+            progresso(mensagem)
+
+    eventos = None
+    if cache_ocorrencias is not None:
+        chave_cache = hash_feed(ics_data)
+        eventos = cache_ocorrencias.obter(chave_cache, data_inicio, data_fim)
+        PERFIL.contar("cache_ocorrencias_hits" if eventos is not None else "cache_ocorrencias_misses")
+
+    if eventos is None:
+        ini, fim = data_inicio, data_fim
+        if cache_ocorrencias is not None:
+            ini, fim = cache_ocorrencias.cobertura(data_inicio, data_fim)
+        etapa("Lendo calendário...")
+        if streaming:
+            calendario = parse_calendario(ics_data, ini, fim)
+        else:
+            calendario = parse_calendario(ics_data)
+        etapa("Expandindo eventos...")
+        eventos = processar_calendario(calendario, ini, fim, cancelado)
+        if cache_ocorrencias is not None:
+            eventos = cache_ocorrencias.gravar(chave_cache, eventos, (ini, fim)).fatia(data_inicio, data_fim)
+    etapa("Resolvendo conflitos...")
+    with PERFIL.span("aplicar_filtros"):
+        eventos = aplicar_filtros(eventos, politica)
+    verificar_cancelamento(cancelado)
+    return eventos
+
+
+def chave_excedente(inicio_local, descricao):
+    """Chave antiga de excess_minutes.json ('%Y%m%d%H%M_descricao'), mantida para migração
+
+    `inicio_local` é o início já no fuso local (ConversorFuso.local).
+    """
+    return f"{inicio_local.strftime('%Y%m%d%H%M')}_{descricao}"
+
+
+def formatar_duracao(minutos):
+    """Formata minutos como na lista (ex: 2h30m ou 45m)"""
+    horas = minutos // 60
+    mins = minutos % 60
+    return f"{horas}h{mins:02d}m" if horas > 0 else f"{mins}m"
+
+
+def texto_totais(totais):
+    return (
+        f"Tempo previsto: {formatar_duracao(totais['total_minutos'])} | "
+        f"Excedidos: {formatar_duracao(totais['total_excess'])} | "
+        f"Tempo Total: {formatar_duracao(totais['total_final'])}"
+    ) + _texto_sobreposicao(totais)
+
+
+def _texto_sobreposicao(totais):
+    """Só aparece quando há eventos sobrepostos (ex: política 'manter_todos' ou eventos locais)"""
+    ocupado = totais.get('total_sem_sobreposicao')
+    if ocupado is None or ocupado == totais['total_minutos']:
+        return ""
+    return f" | Sem sobreposição: {formatar_duracao(ocupado)}"